@@ -0,0 +1,167 @@
+"""
+An anagram index over the short words of the lexicon: every word of up
+to RACK_SIZE letters is filed under its sorted-letter signature, and
+again under each signature left after deleting one or two of its
+letters. A rack query then only has to look up the sub-multisets of its
+real tiles, with blanks standing in for the deleted letters.
+"""
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+from functools import partial
+from itertools import combinations, product
+
+import instrument
+from lexicon import ALPHABET, get_lexicon, load_mapped, open_mapped
+
+BLANK = "@"
+RACK_SIZE = 7
+MAX_BLANKS = 2
+MIN_LENGTH = 2
+
+MAGIC = b"SCRBANAG"
+VERSION = 1
+HEADER = struct.Struct("<8sI32sI3I")
+WORD_SLOT = 8
+
+
+def signature_key(letters):
+    """Encodes a multiset of letters as an integer (base 27 over sorted letters)."""
+    key = 0
+    for letter in sorted(letters):
+        key = key * 27 + ALPHABET.index(letter) + 1
+    return key
+
+
+def build_anagram_index(lexicon, path):
+    """Builds the index for lexicon and writes it to path."""
+    words = [word for word in lexicon.words() if MIN_LENGTH <= len(word) <= RACK_SIZE]
+    tables = [[] for _ in range(MAX_BLANKS + 1)]
+    for word_id, word in enumerate(words):
+        letters = sorted(word)
+        for blanks, table in enumerate(tables):
+            seen = set()
+            for removed in combinations(range(len(letters)), blanks):
+                kept = [letter for i, letter in enumerate(letters) if i not in removed]
+                key = signature_key(kept)
+                if key not in seen:
+                    seen.add(key)
+                    table.append((key, word_id))
+    for table in tables:
+        table.sort()
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, lexicon.checksum, len(words), *(len(t) for t in tables)))
+        f.write(b"".join(word.encode().ljust(WORD_SLOT, b"\0") for word in words))
+        for table in tables:
+            array("Q", (key for key, _ in table)).tofile(f)
+            array("I", (word_id for _, word_id in table)).tofile(f)
+    os.replace(tmp_path, path)
+
+
+class AnagramIndex:
+    """A memory-mapped anagram index; see build_anagram_index for the layout."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, checksum, word_count, *table_sizes = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not an anagram index")
+        self.checksum = checksum
+        view = memoryview(self._mmap)
+        offset = HEADER.size
+        self._words_offset = offset
+        offset += WORD_SLOT * word_count
+        self._tables = []
+        for size in table_sizes:
+            keys = view[offset:offset + 8 * size].cast("Q")
+            offset += 8 * size
+            values = view[offset:offset + 4 * size].cast("I")
+            offset += 4 * size
+            self._tables.append((keys, values))
+
+    def __reduce__(self):
+        return (open_anagram_index, (self.path,))
+
+    def _lookup(self, key, blanks):
+        keys, values = self._tables[blanks]
+        lo = bisect_left(keys, key)
+        if lo == len(keys) or keys[lo] != key:
+            return []
+        hi = bisect_right(keys, key, lo)
+        words = self._mmap
+        start = self._words_offset
+        return [words[start + WORD_SLOT * word_id:start + WORD_SLOT * (word_id + 1)].rstrip(b"\0").decode()
+                for word_id in values[lo:hi]]
+
+    def anagrams(self, letters):
+        """Returns the words spelled by exactly these letters."""
+        return self._lookup(signature_key(letters.upper()), 0)
+
+    def words_from_rack(self, rack, min_length=MIN_LENGTH):
+        """
+        Returns every word that can be spelled from some of the rack's
+        tiles. Letters supplied by blanks ('@') are returned in lowercase,
+        and each word appears once, using as few blanks as possible.
+        """
+        if instrument.enabled:
+            instrument.count("anagram.rack_queries")
+        counts = {}
+        blanks = 0
+        for tile in rack:
+            tile = tile.upper()
+            if tile == BLANK:
+                blanks += 1
+            else:
+                counts[tile] = counts.get(tile, 0) + 1
+        blanks = min(blanks, MAX_BLANKS)
+        letters = sorted(counts)
+
+        found = {}
+        for used_blanks in range(blanks + 1):
+            for choice in product(*(range(counts[letter] + 1) for letter in letters)):
+                size = sum(choice) + used_blanks
+                if size < min_length or size > RACK_SIZE:
+                    continue
+                subset = "".join(letter * n for letter, n in zip(letters, choice))
+                for word in self._lookup(signature_key(subset), used_blanks):
+                    if word not in found:
+                        found[word] = _mark_blanks(word, subset) if used_blanks else word
+        return list(found.values())
+
+
+def _mark_blanks(word, real_letters):
+    """Lowercases the letters of word that real_letters can't supply (the last ones)."""
+    missing = list(word)
+    for letter in real_letters:
+        missing.remove(letter)
+    for letter in missing:
+        i = word.rindex(letter)
+        word = word[:i] + letter.lower() + word[i + 1:]
+    return word
+
+
+def open_anagram_index(path):
+    """Opens an anagram index, sharing one instance per path per process."""
+    return open_mapped(path, AnagramIndex)
+
+
+def load_anagram_index(lexicon=None, cache_file=None):
+    """
+    Returns the anagram index for lexicon, building and caching it next
+    to the lexicon file first if it is missing or out of date.
+    """
+    lexicon = lexicon or get_lexicon()
+    cache_file = cache_file or os.path.splitext(lexicon.path)[0] + ".anagrams"
+    return load_mapped(cache_file, AnagramIndex, MAGIC, VERSION, lexicon.checksum,
+                       partial(build_anagram_index, lexicon))
+
+
+def get_anagram_index():
+    """Returns the anagram index for the shared lexicon."""
+    return load_anagram_index()
@@ -0,0 +1,112 @@
+"""
+Offline position analysis: reads positions as JSON lines, finds the best
+moves for each on a process pool and writes one JSON line per position,
+in input order.
+
+An input line looks like
+
+    {"id": "p1", "board": ["...............", ...], "rack": "AEIRST@"}
+
+with one string per board row ("." or " " for an empty square, lowercase
+for a played blank) and "@" for a blank on the rack. "id" is optional and
+echoed back. A line that can't be analysed produces {"error": ...}.
+
+Positions go to the workers in chunks, and only a bounded number of
+chunks are in flight at once, so memory stays flat however long the
+input is and a slow consumer holds the reader back.
+"""
+import collections
+import functools
+import json
+import multiprocessing
+import sys
+
+from board import Board
+from layouts import layout_for_size
+from movegen import generate_moves
+from pool import lexicon_pool, worker_lexicon
+from search import rank_moves
+
+TOP = 10
+CHUNK_SIZE = 16
+
+def analyze_position(position, top=TOP, lexicon=None):
+    """
+    Returns the top moves for a position dict (see the module docstring)
+    as [{"word", "row", "col", "direction", "score", "equity"}, ...], best
+    score first.
+    """
+    lexicon = lexicon or worker_lexicon()
+    rows = position["board"]
+    layout = layout_for_size(len(rows))
+    board = Board.from_rows(rows, lexicon, layout and layout.premiums)
+    rack = list(position["rack"].upper())
+    ranked = rank_moves(board, rack, generate_moves(board, rack, lexicon))
+    ranked.sort(key=lambda entry: (-entry[1], -entry[0]))
+    return [
+        {"word": word, "row": row, "col": col, "direction": direction, "score": score,
+         "equity": round(equity, 2)}
+        for equity, score, (word, row, col, direction), _ in ranked[:top]
+    ]
+
+
+def analyze_lines(lines, top=TOP):
+    """Analyses a chunk of input lines and returns their output lines."""
+    output = []
+    for line in lines:
+        result = {}
+        try:
+            position = json.loads(line)
+            if "id" in position:
+                result["id"] = position["id"]
+            result["moves"] = analyze_position(position, top)
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            result["error"] = f"{type(e).__name__}: {e}"
+        output.append(json.dumps(result) + "\n")
+    return output
+
+
+def _chunks(lines, size):
+    chunk = []
+    for line in lines:
+        if line.strip():
+            chunk.append(line)
+            if len(chunk) == size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+def run_batch(source="-", out="-", top=TOP, workers=None, chunk_size=CHUNK_SIZE, in_flight=None):
+    """
+    Analyses every position in source (a path or "-" for stdin) and writes
+    the results to out. At most in_flight chunks (default: four per
+    worker) are queued or being worked on at any time. Returns the number
+    of positions written.
+    """
+    workers = workers or multiprocessing.cpu_count()
+    in_flight = in_flight or 4 * workers
+    source_stream = sys.stdin if source == "-" else open(source)
+    stream = sys.stdout if out == "-" else open(out, "w")
+    written = 0
+    try:
+        with lexicon_pool(workers) as pool:
+            analyze = functools.partial(analyze_lines, top=top)
+            pending = collections.deque()
+            for chunk in _chunks(source_stream, chunk_size):
+                if len(pending) >= in_flight:
+                    results = pending.popleft().get()
+                    stream.writelines(results)
+                    written += len(results)
+                pending.append(pool.apply_async(analyze, (chunk,)))
+            while pending:
+                results = pending.popleft().get()
+                stream.writelines(results)
+                written += len(results)
+    finally:
+        if source_stream is not sys.stdin:
+            source_stream.close()
+        if stream is not sys.stdout:
+            stream.close()
+    return written
@@ -0,0 +1,334 @@
+"""
+Benchmark suite for the hot paths of the game.
+
+Fixture positions (opening, mid-game, crowded endgame) are rebuilt from a
+fixed seed on every run, so timings are comparable between runs and
+machines. Each benchmark is repeated and reported as min/median/stdev;
+with a stored baseline, a median that regresses past the tolerance makes
+the run exit non-zero.
+
+    python bench.py                    # run and compare with bench_baseline.json
+    python bench.py --save-baseline    # record the current timings as the baseline
+    python bench.py --verify           # check generate_moves against a brute-force search
+"""
+import argparse
+import json
+import os
+import random
+import re
+import statistics
+import sys
+import time
+
+from anagram import get_anagram_index
+from board import create_board, append_special_tiles
+from lexicon import Lexicon, get_lexicon
+from main import computer_turn, find_possible_moves, is_valid_word, load_wordlist
+from movegen import generate_moves
+from player import Player
+import render
+from scoring import score_move, score_moves
+from simulate import play_selfplay_game
+from tiles import TileBag, calculate_score, draw_tiles
+from validate import validate_move
+
+SEED = 20240101
+BASELINE_FILE = "bench_baseline.json"
+SAMPLE_WORDS = 1000
+
+
+def build_fixtures(seed=SEED):
+    """
+    Replays a seeded self-play game and keeps three positions from it:
+    the empty opening board, a mid-game board and the first board with
+    an empty bag. Returns {name: (board, player)}.
+    """
+    lexicon = get_lexicon()
+    random.seed(seed)
+    tile_bag = TileBag(seed=seed)
+    board = create_board(lexicon)
+    players = [Player("Computer 1"), Player("Computer 2")]
+    for player in players:
+        player.rack = draw_tiles(tile_bag, 7)
+
+    def snapshot(player):
+        copy = Player(player.name)
+        copy.rack = list(player.rack)
+        return board.copy(), copy
+
+    fixtures = {}
+    first_move = True
+    turn = 0
+    with render.quiet():
+        append_special_tiles(board)
+        fixtures["opening"] = snapshot(players[0])
+        while "endgame" not in fixtures and turn < 100:
+            player = players[turn % 2]
+            if turn == 10:
+                fixtures["midgame"] = snapshot(player)
+            if not tile_bag and turn >= 10:
+                fixtures["endgame"] = snapshot(player)
+                break
+            first_move = computer_turn(player, board, lexicon, first_move, score_move, tile_bag)
+            turn += 1
+    fixtures.setdefault("endgame", snapshot(players[turn % 2]))
+    return fixtures
+
+
+def draw_full_bag():
+    """Empties a freshly shuffled bag seven tiles at a time."""
+    bag = TileBag(seed=SEED)
+    while bag:
+        draw_tiles(bag, 7)
+
+
+def build_benchmarks(fixtures):
+    """Returns a list of (name, callable) pairs to time."""
+    lexicon = get_lexicon()
+    rng = random.Random(SEED)
+    words = rng.sample(list(lexicon.words()), SAMPLE_WORDS)
+    bag = TileBag(seed=SEED)
+    anagrams = get_anagram_index()
+
+    benchmarks = [
+        ("load_wordlist", load_wordlist),
+        ("lexicon_open", lambda: Lexicon(lexicon.path)),
+        (f"is_valid_word x{SAMPLE_WORDS}", lambda: [is_valid_word(word) for word in words]),
+        (f"lexicon_lookup x{SAMPLE_WORDS}", lambda: [word in lexicon for word in words]),
+        ("draw_tiles full bag", draw_full_bag),
+        ("tile_bag snapshot+restore", lambda: bag.restore(bag.snapshot())),
+        (f"calculate_score x{SAMPLE_WORDS}", lambda: [calculate_score(word) for word in words]),
+        ("words_from_rack RETAINS", lambda: anagrams.words_from_rack("RETAINS")),
+        ("words_from_rack QUIZ@@E", lambda: anagrams.words_from_rack("QUIZ@@E")),
+    ]
+    for name, (board, player) in fixtures.items():
+        moves = find_possible_moves(player, board, lexicon)
+        benchmarks += [
+            (f"find_possible_moves {name}",
+             lambda board=board, player=player: find_possible_moves(player, board, lexicon)),
+            (f"validate_move {name} x{len(moves)}",
+             lambda board=board, player=player, moves=moves: [validate_move(board, *move, player.rack, lexicon)
+                                                              for move in moves]),
+            (f"score_moves {name} x{len(moves)}",
+             lambda board=board, moves=moves: score_moves(board, moves)),
+        ]
+    benchmarks.append(("selfplay game", lambda: play_selfplay_game(SEED, lexicon)))
+    return benchmarks
+
+
+def perpendicular_tiles(board, row, col, direction):
+    """
+    Reads the tiles either side of (row, col) across a move in direction,
+    cell by cell: returns (before, after), uppercased.
+    """
+    d_row, d_col = (1, 0) if direction == "H" else (0, 1)
+    before, after = "", ""
+    r, c = row - d_row, col - d_col
+    while board.letter_at(r, c):
+        before = board.letter_at(r, c) + before
+        r, c = r - d_row, c - d_col
+    r, c = row + d_row, col + d_col
+    while board.letter_at(r, c):
+        after += board.letter_at(r, c)
+        r, c = r + d_row, c + d_col
+    return before.upper(), after.upper()
+
+
+def brute_force_moves(board, rack, words_by_length, lexicon):
+    """
+    Finds every legal move the slow way, from the board's cells alone and
+    without the anchor and cross-check tables move generation relies on:
+    tries each word of the lexicon (words_by_length maps a length to its
+    words, one per line) on every stretch of every row and column that
+    touches a tile already down (or covers the centre of an empty board),
+    and keeps the ones the rack can pay for whose cross-words, read off
+    the board, are all words. Returns them as a set with uppercase words.
+    """
+    size = board.size
+    letters = "".join(sorted({tile for tile in rack if tile != "@"}))
+    free = "[A-Z]" if "@" in rack else f"[{letters}]" if letters else None
+    tiles_in_rack = {}
+    for tile in rack:
+        tiles_in_rack[tile] = tiles_in_rack.get(tile, 0) + 1
+    empty = board.is_empty()
+    center = size // 2
+    found = set()
+    for direction in ("H", "V"):
+        for line in range(size):
+            tiles = board.line(direction, line)
+            squares = [(line, pos) if direction == "H" else (pos, line) for pos in range(size)]
+            crossing = {pos: perpendicular_tiles(board, *squares[pos], direction)
+                        for pos in range(size) if tiles[pos] is None}
+            for start in range(size):
+                if start > 0 and tiles[start - 1]:
+                    continue
+                for end in range(start + 2, size + 1):
+                    if end < size and tiles[end]:
+                        continue
+                    stretch = tiles[start:end]
+                    gaps = stretch.count(None)
+                    if not gaps or gaps > len(rack) or free is None:
+                        continue
+                    if empty:
+                        if line != center or not start <= center < end:
+                            continue
+                    elif gaps == len(stretch) and not any(crossing[pos] != ("", "") for pos in range(start, end)):
+                        continue
+                    pattern = "".join(free if tile is None else tile.upper() for tile in stretch)
+                    for word in re.findall(f"^{pattern}$", words_by_length.get(end - start, ""), re.M):
+                        counts = dict(tiles_in_rack)
+                        legal = True
+                        for pos, letter in enumerate(word, start):
+                            if tiles[pos] is not None:
+                                continue
+                            tile = letter if counts.get(letter) else "@"
+                            before, after = crossing[pos]
+                            if not counts.get(tile) or ((before or after) and before + letter + after not in lexicon):
+                                legal = False
+                                break
+                            counts[tile] -= 1
+                        if legal:
+                            found.add((word, *squares[start], direction))
+    return found
+
+
+def random_position(rng, lexicon):
+    """Plays a random number of random legal moves and deals a fresh rack, sometimes with a blank."""
+    board = append_special_tiles(create_board(lexicon))
+    bag = TileBag(rng=rng)
+    for _ in range(rng.randrange(12)):
+        moves = generate_moves(board, draw_tiles(bag, 7), lexicon)
+        if moves:
+            board.place(*rng.choice(moves))
+    rack = draw_tiles(TileBag(rng=rng), 7)
+    if "@" not in rack and rng.random() < 0.5:
+        rack[0] = "@"
+    return board, rack
+
+
+def verify(positions=10, seed=SEED):
+    """
+    Compares generate_moves() with brute_force_moves() on the fixture
+    positions and on random ones. Prints a line per position and returns
+    the process exit code.
+    """
+    lexicon = get_lexicon()
+    words_by_length = {}
+    for word in lexicon.words():
+        words_by_length.setdefault(len(word), []).append(word)
+    words_by_length = {length: "\n".join(words) for length, words in words_by_length.items()}
+    rng = random.Random(seed)
+    cases = [(name, board, player.rack) for name, (board, player) in build_fixtures(seed).items()]
+    cases += [(f"random {i}", *random_position(rng, lexicon)) for i in range(positions)]
+    failures = 0
+    for name, board, rack in cases:
+        generated = {(word.upper(), row, col, direction)
+                     for word, row, col, direction in generate_moves(board, rack, lexicon)}
+        expected = brute_force_moves(board, rack, words_by_length, lexicon)
+        line = f"{name:12} rack {''.join(rack):7}  {len(generated):5} generated  {len(expected):5} brute force"
+        if generated == expected:
+            print(f"{line}  OK")
+            continue
+        failures += 1
+        print(f"{line}  MISMATCH")
+        for move in sorted(expected - generated)[:5]:
+            print(f"    missing {move}")
+        for move in sorted(generated - expected)[:5]:
+            print(f"    extra   {move}")
+    if failures:
+        print(f"{failures} of {len(cases)} position(s) differ.")
+        return 1
+    print(f"generate_moves matches the brute-force search on all {len(cases)} positions.")
+    return 0
+
+
+def measure(func, repeat, min_time=0.05):
+    """
+    Times func and returns per-call statistics in seconds. Fast functions
+    are looped so each sample lasts at least min_time.
+    """
+    func()  # warm caches
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time or loops >= 1 << 20:
+            break
+        loops *= 2
+    samples = [elapsed / loops]
+    for _ in range(repeat - 1):
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        samples.append((time.perf_counter() - started) / loops)
+    return {
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "loops": loops,
+        "repeat": repeat,
+    }
+
+
+def format_time(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:8.3f} {unit}"
+    return f"{seconds / 1e-9:8.1f} ns"
+
+
+def run(repeat=7, baseline_file=BASELINE_FILE, tolerance=0.25, save=False, only=None):
+    """Runs the suite, prints a report and returns the process exit code."""
+    fixtures = build_fixtures()
+    baseline = {}
+    if os.path.exists(baseline_file) and not save:
+        with open(baseline_file) as f:
+            baseline = json.load(f)
+
+    results = {}
+    regressions = []
+    print(f"{'benchmark':48} {'min':>11} {'median':>11} {'stdev':>11}  vs baseline")
+    for name, func in build_benchmarks(fixtures):
+        if only and only not in name:
+            continue
+        stats = results[name] = measure(func, repeat)
+        line = f"{name:48} {format_time(stats['min'])} {format_time(stats['median'])} {format_time(stats['stdev'])}"
+        if name in baseline:
+            ratio = stats["median"] / baseline[name]["median"]
+            line += f"  {ratio:6.2f}x"
+            if ratio > 1 + tolerance:
+                line += "  REGRESSION"
+                regressions.append(name)
+        print(line)
+
+    if save:
+        with open(baseline_file, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Baseline saved to '{baseline_file}'.")
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed by more than {tolerance:.0%}.")
+        return 1
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Scrabble engine.")
+    parser.add_argument("--repeat", type=int, default=7, help="samples per benchmark")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="baseline JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed median slowdown before failing (0.25 = 25%%)")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--only", help="run only benchmarks whose name contains this text")
+    parser.add_argument("--verify", action="store_true",
+                        help="check generate_moves against a brute-force search instead of timing")
+    parser.add_argument("--positions", type=int, default=10, help="random positions to verify")
+    args = parser.parse_args(argv)
+    if args.verify:
+        return verify(args.positions)
+    return run(args.repeat, args.baseline, args.tolerance, args.save_baseline, args.only)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,82 +1,309 @@
-def create_board():
-    """Creates a 15x15 Scrabble board."""
-    return [[" " for _ in range(15)] for _ in range(15)]
-def append_special_tiles(board):
+import math
+from array import array
+
+import instrument
+from render import show_board
+
+from layouts import PREMIUM_NAMES, STANDARD, layout_for_size
+from lexicon import ALPHABET, ALL_LETTERS, get_lexicon
+from tiles import LETTER_POINTS
+
+LETTER_BITS = {letter: 1 << i for i, letter in enumerate(ALPHABET)}
+
+STANDARD_PREMIUMS = STANDARD.premiums
+
+MASK_CACHE_SIZE = 1 << 16
+_mask_cache = {}
+
+
+def tile_points(tile):
+    """Returns the face value of a tile; played blanks (lowercase) score nothing."""
+    return 0 if tile.islower() else LETTER_POINTS[tile]
+
+
+def cross_check_mask(prefix, suffix, lexicon):
+    """
+    Returns a bitmask of the letters that can go between prefix and suffix
+    to form a word. Squares with no perpendicular neighbours allow anything.
+    Results are memoized, since search keeps placing and taking back moves
+    that recreate the same cross words.
+    """
+    if not prefix and not suffix:
+        return ALL_LETTERS
+    prefix, suffix = prefix.upper(), suffix.upper()
+    key = (lexicon.checksum, prefix, suffix)
+    mask = _mask_cache.get(key)
+    if mask is not None:
+        return mask
+    mask = 0
+    found = lexicon.walk(prefix)
+    if found is not None:
+        for letter, (child, terminal) in lexicon.children(found[0]).items():
+            if suffix:
+                end = lexicon.walk(suffix, child)
+                terminal = end is not None and end[1]
+            if terminal:
+                mask |= LETTER_BITS[letter]
+    if len(_mask_cache) >= MASK_CACHE_SIZE:
+        _mask_cache.clear()
+    _mask_cache[key] = mask
+    return mask
+
+
+class Board:
+    """
+    A square board stored as one byte per cell: 0 for an empty square,
+    otherwise the ASCII code of the tile (lowercase for a played blank).
+    Premium squares live in a separate, shared read-only layer.
+
+    The board also keeps its anchor squares, cross-check masks and
+    cross-word scores up to date as words are placed. All are stored per
+    direction in line-major order, so index line * size + pos addresses
+    row/col for "H" and col/row for "V", and one line of either direction
+    is a plain slice. A cross-word score is the face value of the tiles a
+    square's perpendicular word already has, or -1 if it would form none.
+    """
+
+    __slots__ = ("size", "cells", "premiums", "lexicon", "anchor_flags", "cross_checks", "cross_scores")
+
+    def __init__(self, size=15, lexicon=None, premiums=None):
+        self.size = size
+        self.cells = bytearray(size * size)
+        self.premiums = premiums or bytes(size * size)
+        self.lexicon = lexicon
+        self.anchor_flags = {"H": bytearray(size * size), "V": bytearray(size * size)}
+        center = size // 2
+        self.anchor_flags["H"][center * size + center] = 1
+        self.anchor_flags["V"][center * size + center] = 1
+        self.cross_checks = {
+            "H": array("I", [ALL_LETTERS]) * (size * size),
+            "V": array("I", [ALL_LETTERS]) * (size * size),
+        }
+        self.cross_scores = {
+            "H": array("i", [-1]) * (size * size),
+            "V": array("i", [-1]) * (size * size),
+        }
+
+    @classmethod
+    def from_cells(cls, cells, lexicon=None, premiums=None):
+        """Builds a board, with its anchors and cross-checks, from row-major tile bytes."""
+        size = math.isqrt(len(cells))
+        board = cls(size, lexicon, premiums)
+        board.cells[:] = cells
+        board._refresh([divmod(i, size) for i, tile in enumerate(board.cells) if tile])
+        return board
+
+    @classmethod
+    def from_rows(cls, rows, lexicon=None, premiums=None):
+        """
+        Builds a board from one string per row, with "." or " " for an
+        empty square and lowercase for a played blank.
+        """
+        if not rows or any(len(row) != len(rows) for row in rows):
+            raise ValueError("rows must form a non-empty square")
+        cells = "".join(rows).replace(".", "\0").replace(" ", "\0").encode("ascii")
+        if not all(tile == 0 or chr(tile).isalpha() for tile in cells):
+            raise ValueError("rows may only hold letters, '.' and ' '")
+        return cls.from_cells(cells, lexicon, premiums)
+
+    def __getitem__(self, square):
+        """Returns what the square shows: its tile, else its premium marker or a space."""
+        row, col = square
+        tile = self.cells[row * self.size + col]
+        if tile:
+            return chr(tile)
+        center = self.size // 2
+        if row == center and col == center and any(self.premiums):
+            return "*"
+        return PREMIUM_NAMES[self.premiums[row * self.size + col]] or " "
+
+    def __len__(self):
+        return self.size
+
+    def __eq__(self, other):
+        return isinstance(other, Board) and self.cells == other.cells
+
+    def __hash__(self):
+        return hash(bytes(self.cells))
+
+    def copy(self):
+        board = Board.__new__(Board)
+        board.size = self.size
+        board.cells = self.cells[:]
+        board.premiums = self.premiums
+        board.lexicon = self.lexicon
+        board.anchor_flags = {d: flags[:] for d, flags in self.anchor_flags.items()}
+        board.cross_checks = {d: checks[:] for d, checks in self.cross_checks.items()}
+        board.cross_scores = {d: scores[:] for d, scores in self.cross_scores.items()}
+        return board
+
+    @property
+    def anchors(self):
+        """The set of (row, col) anchor squares."""
+        flags = self.anchor_flags["H"]
+        return {divmod(i, self.size) for i, flag in enumerate(flags) if flag}
+
+    def letter_at(self, row, col):
+        """Returns the tile at (row, col), or None if the square is empty or off the board."""
+        if 0 <= row < self.size and 0 <= col < self.size:
+            tile = self.cells[row * self.size + col]
+            return chr(tile) if tile else None
+        return None
+
+    def premium_at(self, row, col):
+        """Returns the premium marker of (row, col), or "" for a plain square."""
+        return PREMIUM_NAMES[self.premiums[row * self.size + col]]
+
+    def is_empty(self):
+        """Checks whether no tiles have been placed yet."""
+        return not any(self.cells)
+
+    def row(self, index):
+        """Returns the raw tile bytes of a row."""
+        return bytes(self.cells[index * self.size:(index + 1) * self.size])
+
+    def column(self, index):
+        """Returns the raw tile bytes of a column."""
+        return bytes(self.cells[index::self.size])
+
+    def line(self, direction, index):
+        """Returns row ("H") or column ("V") index as a list of tiles, None for empty squares."""
+        tiles = self.row(index) if direction == "H" else self.column(index)
+        return [chr(tile) if tile else None for tile in tiles]
+
+    def line_anchors(self, direction, index):
+        """Returns the anchor flags along a row ("H") or column ("V")."""
+        return self.anchor_flags[direction][index * self.size:(index + 1) * self.size]
+
+    def line_checks(self, direction, index):
+        """Returns the cross-check masks along a row ("H") or column ("V")."""
+        return self.cross_checks[direction][index * self.size:(index + 1) * self.size]
+
+    def cross_check(self, row, col, direction):
+        """Returns the cross-check mask of (row, col) for a move in direction."""
+        if direction == "H":
+            return self.cross_checks["H"][row * self.size + col]
+        return self.cross_checks["V"][col * self.size + row]
+
+    def place(self, word, start_row, start_col, direction, undo=None):
+        """
+        Writes word onto the board and refreshes the anchors and cross-checks
+        around the newly placed tiles. Returns the squares that were filled.
+        If undo is a list, the previous value of every anchor and cross-check
+        entry that changes is appended to it, for unplace().
+        """
+        placed = []
+        size = self.size
+        for i, letter in enumerate(word):
+            row, col = (start_row, start_col + i) if direction == "H" else (start_row + i, start_col)
+            index = row * size + col
+            if not self.cells[index]:
+                placed.append((row, col))
+            self.cells[index] = ord(letter)
+        self._refresh(placed, undo)
+        return placed
+
+    def unplace(self, placed, undo):
+        """Takes back a place() given the squares it filled and its undo list."""
+        size = self.size
+        for row, col in placed:
+            self.cells[row * size + col] = 0
+        entries = reversed(undo)
+        for value, index, table in zip(entries, entries, entries):
+            table[index] = value
+
+    def _refresh(self, squares, undo=None):
+        """Updates the anchors and cross-checks of the squares next to squares."""
+        size, cells = self.size, self.cells
+        anchors_h, anchors_v = self.anchor_flags["H"], self.anchor_flags["V"]
+        for row, col in squares:
+            if undo is not None:
+                undo += (anchors_h, row * size + col, anchors_h[row * size + col],
+                         anchors_v, col * size + row, anchors_v[col * size + row])
+            anchors_h[row * size + col] = 0
+            anchors_v[col * size + row] = 0
+        for row, col in squares:
+            for d_row, d_col in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+                r, c = row + d_row, col + d_col
+                while 0 <= r < size and 0 <= c < size and cells[r * size + c]:
+                    r, c = r + d_row, c + d_col
+                if 0 <= r < size and 0 <= c < size:
+                    if d_row:
+                        direction, index, step = "H", r * size + c, (1, 0)
+                    else:
+                        direction, index, step = "V", c * size + r, (0, 1)
+                    checks, scores = self.cross_checks[direction], self.cross_scores[direction]
+                    if undo is not None:
+                        undo += (anchors_h, r * size + c, anchors_h[r * size + c],
+                                 anchors_v, c * size + r, anchors_v[c * size + r],
+                                 checks, index, checks[index], scores, index, scores[index])
+                    anchors_h[r * size + c] = 1
+                    anchors_v[c * size + r] = 1
+                    checks[index], scores[index] = self._cross_check(r, c, *step)
+
+    def _cross_check(self, row, col, d_row, d_col):
+        """
+        Computes the mask and cross-word score for the empty square
+        (row, col) from the tiles on either side of it.
+        """
+        size, cells = self.size, self.cells
+        pos = row if d_row else col
+        step = size if d_row else 1
+        index = start = end = row * size + col
+        while pos > 0 and cells[start - step]:
+            start -= step
+            pos -= 1
+        pos = row if d_row else col
+        while pos < size - 1 and cells[end + step]:
+            end += step
+            pos += 1
+        if start == end:
+            return ALL_LETTERS, -1
+        before = cells[start:index:step].decode()
+        after = cells[index + step:end + step:step].decode()
+        if self.lexicon is None:
+            self.lexicon = get_lexicon()
+        if instrument.enabled:
+            instrument.count("board.cross_checks")
+        mask = cross_check_mask(before, after, self.lexicon)
+        return mask, sum(map(tile_points, before + after))
+
+
+def create_board(lexicon=None, layout=STANDARD):
+    """Creates an empty board of the layout's size (15x15 by default)."""
+    return Board(layout.size, lexicon)
+
+
+def append_special_tiles(board, layout=None):
     """
     Appends special tiles to the board based on correct coordinates.
+    Premiums are kept in their own layer, so placed tiles never hide them.
+    Without a layout, the one matching the board's size is used.
     """
-    SPECIAL_TILES = {
-        "TW": [(0, 0), (0, 7), (0, 14), (7, 0), (7, 14), (14, 0), (14, 7), (14, 14)],
-        "DW": [
-            (1, 1), (1, 13), (2, 2), (2, 12), (3, 3), (3, 11), (4, 4), (4, 10), (7, 7),
-            (10, 4), (10, 10), (11, 3), (11, 11), (12, 2), (12, 12), (13, 1), (13, 13)
-        ],
-        "TL": [
-            (1, 5), (1, 9), (5, 1), (5, 5), (5, 9), (5, 13),
-            (9, 1), (9, 5), (9, 9), (9, 13), (13, 5), (13, 9)
-        ],
-        "DL": [
-            (0, 3), (0, 11), (2, 6), (2, 8), (3, 0), (3, 7), (3, 14), 
-            (6, 2), (6, 6), (6, 8), (6, 12), (7, 3), (7, 11), (8, 2), 
-            (8, 6), (8, 8), (8, 12), (11, 0), (11, 7), (11, 14), 
-            (12, 6), (12, 8), (14, 3), (14, 11)
-        ]
-    }
-    # Place each type of special tile at its respective coordinates
-    for tile_type, positions in SPECIAL_TILES.items():
-        for row, col in positions:
-            board[row][col] = tile_type
-    
-    # Center star tile
-    board[7][7] = "*"
-    print("\nDebug: Special tiles added to the board.")    
+    layout = layout or layout_for_size(board.size)
+    if layout is None or layout.size != board.size:
+        raise ValueError(f"no premium layout for a {board.size}x{board.size} board")
+    board.premiums = layout.premiums
     return board
 
 
 def print_board(board):
-    """Prints the board in a readable format."""
-    print("    " + " "+"   ".join(f"{i:2}" for i in range(15)))
-    print("   " + "-" * 76)
-    for i, row in enumerate(board):
-        print(f"{i:2} | " + " | ".join(f"{cell:2}" if len(cell) == 1 else f"{cell}" for cell in row) + " |")
-        print("   " + "-" * 76)
+    """Prints the board in a readable format (see render.py)."""
+    show_board(board)
 
 
 def place_word(board, word, start_row, start_col, direction):
-    if direction == "H":
-        for i, letter in enumerate(word):
-            board[start_row][start_col + i] = letter
-    elif direction == "V":
-        for i, letter in enumerate(word):
-            board[start_row + i][start_col] = letter
+    if direction in ("H", "V"):
+        board.place(word, start_row, start_col, direction)
 
 def is_valid_move(board, word, start_row, start_col, direction):
     """
-    Validates if the word can be placed on the board.
+    Validates if the word can be placed on the board under the full rules
+    (see validate.py), whoever's tiles it uses.
     Returns True if valid, False otherwise.
     """
-    # print(f"Debug: Validating move for '{word}' at ({start_row}, {start_col}) going {direction}")
-    
-    if direction == "H":
-        if start_col + len(word) > 15:
-            print("Debug: Word goes out of horizontal bounds.")
-            return False
-        for i, letter in enumerate(word):
-            current_cell = board[start_row][start_col + i]
-            # Allow placement on empty spaces or special tiles
-            if current_cell not in (" ", "DL", "TL", "DW", "TW", "*", letter):  
-                # print(f"Debug: Cell conflict at ({start_row}, {start_col + i}). Cell: '{current_cell}', Letter: '{letter}'")
-                return False
-    elif direction == "V":
-        if start_row + len(word) > 15:
-            print("Debug: Word goes out of vertical bounds.")
-            return False
-        for i, letter in enumerate(word):
-            current_cell = board[start_row + i][start_col]
-            if current_cell not in (" ", "DL", "TL", "DW", "TW", "*", letter):
-                # print(f"Debug: Cell conflict at ({start_row + i}, {start_col}). Cell: '{current_cell}', Letter: '{letter}'")
-                return False
-    return True
+    from validate import validate_move
+    return bool(validate_move(board, word, start_row, start_col, direction))
 
 if __name__ == "__main__":
     board = create_board()
@@ -0,0 +1,247 @@
+"""
+Endgame solver for the empty-bag phase, when both racks are known.
+
+Iterative-deepening negamax with alpha-beta pruning over GameState
+make/unmake. Moves are tried best-first: the transposition table's move
+for the position, then by score. Positions are keyed by Zobrist hashing
+(tiles on squares, tiles on each rack, side to move and the pass count),
+updated incrementally for the board. Values are the spread the side to
+move can still gain, so table entries don't depend on how the position
+was reached.
+"""
+import random
+import time
+
+from scoring import score_moves
+
+EXACT, LOWER, UPPER = 0, 1, 2
+PASS = None
+TABLE_SIZE = 1 << 20
+
+_rng = random.Random(0x5C7A881E)
+_square_keys = {}
+RACK_KEYS = [{} for _ in range(2)]
+SIDE_KEY = _rng.getrandbits(64)
+PASS_KEYS = [_rng.getrandbits(64) for _ in range(3)]
+
+
+def _square_key(index, tile):
+    key = _square_keys.get((index, tile))
+    if key is None:
+        key = _square_keys[index, tile] = _rng.getrandbits(64)
+    return key
+
+
+def _rack_key(player, rack):
+    keys = RACK_KEYS[player]
+    key = 0
+    seen = {}
+    for tile in rack:
+        copy = seen[tile] = seen.get(tile, 0) + 1
+        entry = keys.get((tile, copy))
+        if entry is None:
+            entry = keys[tile, copy] = _rng.getrandbits(64)
+        key ^= entry
+    return key
+
+
+def board_key(board):
+    """Returns the Zobrist key of the tiles on board."""
+    key = 0
+    for index, tile in enumerate(board.cells):
+        if tile:
+            key ^= _square_key(index, tile)
+    return key
+
+
+class SearchStats:
+    """Counters from one solve(): nodes searched, table probes and hits, depth reached."""
+
+    __slots__ = ("nodes", "probes", "hits", "depth", "elapsed")
+
+    def __init__(self):
+        self.nodes = self.probes = self.hits = self.depth = 0
+        self.elapsed = 0.0
+
+    @property
+    def nodes_per_second(self):
+        return self.nodes / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def hit_rate(self):
+        return self.hits / self.probes if self.probes else 0.0
+
+    def __str__(self):
+        return (f"depth {self.depth}, {self.nodes} nodes ({self.nodes_per_second:,.0f}/s), "
+                f"TT hit rate {self.hit_rate:.0%}")
+
+
+class _Timeout(Exception):
+    pass
+
+
+class EndgameSolver:
+    """
+    Solves two-player endgames. The transposition table is kept between
+    solve() calls, so consecutive turns of one endgame reuse earlier work.
+    """
+
+    def __init__(self, table_size=TABLE_SIZE):
+        self.table = {}
+        self.table_size = table_size
+        self.stats = SearchStats()
+        self._deadline = 0.0
+        self._cut = False
+
+    def solve(self, state, time_budget=1.0, max_depth=None):
+        """
+        Searches state (a two-player GameState with an empty bag) for up to
+        time_budget seconds. Returns (spread, line): the spread the player
+        to move can gain from here under best play by both sides, and the
+        principal variation as a list of moves, None standing for a pass.
+        The first depth is always completed, so line is never empty unless
+        the game is over.
+        """
+        self.stats = stats = SearchStats()
+        started = time.perf_counter()
+        self._deadline = started + time_budget
+        if len(self.table) > self.table_size:
+            self.table.clear()
+        # Enough plies for both racks to be played out one tile at a time, plus passes.
+        max_depth = max_depth or sum(len(player.rack) for player in state.players) + 2
+
+        board_hash = board_key(state.board)
+        history = len(state)
+        best = (0, [])
+        for depth in range(1, max_depth + 1):
+            self._cut = False
+            try:
+                value = self._search(state, board_hash, depth, -10 ** 6, 10 ** 6, depth > 1)
+            except _Timeout:
+                while len(state) > history:
+                    state.undo()
+                break
+            best = (value, self._principal_variation(state, board_hash, depth))
+            stats.depth = depth
+            if not self._cut or time.perf_counter() >= self._deadline:
+                break  # no line reached the horizon: the game tree is solved
+        stats.elapsed = time.perf_counter() - started
+        return best
+
+    def _key(self, state, board_hash):
+        key = board_hash ^ PASS_KEYS[min(state.passes, 2)]
+        if state.turn:
+            key ^= SIDE_KEY
+        for i, player in enumerate(state.players):
+            key ^= _rack_key(i, player.rack)
+        return key
+
+    def _ordered_moves(self, state, best_move):
+        moves = state.moves()
+        scored = sorted(zip(score_moves(state.board, moves), moves), key=lambda entry: -entry[0])
+        ordered = [move for _, move in scored]
+        ordered.append(PASS)
+        if best_move in ordered:
+            ordered.remove(best_move)
+            ordered.insert(0, best_move)
+        return ordered
+
+    def _child_hash(self, board, board_hash, move):
+        word, row, col, direction = move
+        size, cells = board.size, board.cells
+        index = row * size + col
+        step = 1 if direction == "H" else size
+        for letter in word:
+            if not cells[index]:
+                board_hash ^= _square_key(index, ord(letter))
+            index += step
+        return board_hash
+
+    def _search(self, state, board_hash, depth, alpha, beta, check_time):
+        """
+        Returns the spread the side to move gains from here, searching depth
+        plies. Table entries are (depth, value, bound, cut, move), where cut
+        records whether the value relied on the horizon anywhere below.
+        """
+        stats = self.stats
+        stats.nodes += 1
+        if check_time and time.perf_counter() >= self._deadline:
+            raise _Timeout
+        if state.is_over():
+            return 0
+
+        key = self._key(state, board_hash)
+        stats.probes += 1
+        entry = self.table.get(key)
+        best_move = None
+        if entry is not None:
+            stats.hits += 1
+            entry_depth, value, bound, cut, best_move = entry
+            if entry_depth >= depth or not cut:
+                if (bound == EXACT or bound == LOWER and value >= beta
+                        or bound == UPPER and value <= alpha):
+                    self._cut = self._cut or cut
+                    return value
+
+        if depth == 0:
+            # Horizon: count only the spread so far, which keeps depth 1 a cheap greedy pass.
+            self._cut = True
+            return 0
+
+        if depth == 1:
+            # Every child is a horizon or a finished game, worth just the move's score.
+            moves = state.moves()
+            scores = score_moves(state.board, moves)
+            best_value = max(scores, default=0)
+            best = moves[scores.index(best_value)] if best_value > 0 else PASS
+            self._cut = True
+            self.table[key] = (depth, best_value, EXACT, True, best)
+            return best_value
+
+        outer_cut, self._cut = self._cut, False
+        original_alpha = alpha
+        best_value = None
+        for move in self._ordered_moves(state, best_move):
+            if move is PASS:
+                state.pass_turn()
+                value = -self._search(state, board_hash, depth - 1, -beta, -alpha, check_time)
+            else:
+                child_hash = self._child_hash(state.board, board_hash, move)
+                score = state.play(*move)
+                value = score - self._search(state, child_hash, depth - 1, score - beta, score - alpha, check_time)
+            state.undo()
+            if best_value is None or value > best_value:
+                best_value, best = value, move
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+        if best_value <= original_alpha:
+            bound = UPPER
+        elif best_value >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.table[key] = (depth, best_value, bound, self._cut, best)
+        self._cut = outer_cut or self._cut
+        return best_value
+
+    def _principal_variation(self, state, board_hash, depth):
+        """Follows the table's best moves from state, then puts everything back."""
+        line = []
+        for _ in range(depth):
+            if state.is_over():
+                break
+            entry = self.table.get(self._key(state, board_hash))
+            if entry is None:
+                break
+            move = entry[4]
+            line.append(move)
+            if move is PASS:
+                state.pass_turn()
+            else:
+                board_hash = self._child_hash(state.board, board_hash, move)
+                state.play(*move)
+        for _ in line:
+            state.undo()
+        return line
@@ -0,0 +1,234 @@
+"""
+A word finder for patterns such as "Q?I*": letters stand for themselves,
+'?' for any one letter and '*' for any run of letters, possibly empty.
+
+Queries are answered from positional bitmaps over the words of the
+lexicon, one bit per word in alphabetical order: a bitmap per word
+length, per (position from the start, letter), per (position from the
+end, letter) and per letter the word contains. A pattern's fixed letters
+and length limits select bitmaps that are ANDed together, so only the
+surviving candidates are ever looked at, and they are checked and
+yielded one at a time.
+"""
+import mmap
+import os
+import re
+import struct
+from array import array
+from functools import partial
+
+import instrument
+from lexicon import ALPHABET, get_lexicon, load_mapped, open_mapped
+
+BLANK = "@"
+MIN_LENGTH = 2
+WILDCARD = "?"
+GAP = "*"
+
+MAGIC = b"SCRBFIND"
+VERSION = 1
+HEADER = struct.Struct("<8sI32sIIB")
+
+
+def build_word_finder(lexicon, path):
+    """Builds the word finder's bitmaps for lexicon and writes them to path."""
+    words = list(lexicon.words())
+    longest = max(map(len, words))
+    width = (len(words) + 7) // 8
+    bitmaps = [bytearray(width) for _ in range(_bitmap_count(longest))]
+    for word_id, word in enumerate(words):
+        byte, bit = word_id >> 3, 1 << (word_id & 7)
+        length = len(word)
+        bitmaps[length][byte] |= bit
+        for pos, letter in enumerate(word):
+            code = ALPHABET.index(letter)
+            bitmaps[_start_bitmap(longest, pos, code)][byte] |= bit
+            bitmaps[_end_bitmap(longest, length - 1 - pos, code)][byte] |= bit
+            bitmaps[_contains_bitmap(longest, code)][byte] |= bit
+
+    blob = "".join(words).encode()
+    offsets = array("I", [0])
+    for word in words:
+        offsets.append(offsets[-1] + len(word))
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, lexicon.checksum, len(words), len(blob), longest))
+        offsets.tofile(f)
+        f.write(blob)
+        for bitmap in bitmaps:
+            f.write(bitmap)
+    os.replace(tmp_path, path)
+
+
+# Bitmaps are stored by length (0..longest), then by position from the
+# start and letter, by position from the end and letter, and by letter.
+def _bitmap_count(longest):
+    return longest + 1 + 2 * longest * len(ALPHABET) + len(ALPHABET)
+
+
+def _start_bitmap(longest, pos, code):
+    return longest + 1 + pos * len(ALPHABET) + code
+
+
+def _end_bitmap(longest, pos, code):
+    return longest + 1 + (longest + pos) * len(ALPHABET) + code
+
+
+def _contains_bitmap(longest, code):
+    return longest + 1 + 2 * longest * len(ALPHABET) + code
+
+
+def parse_pattern(pattern):
+    """
+    Splits a pattern into its letters (uppercased) and wildcards.
+    Raises ValueError for any other character.
+    """
+    tokens = list(pattern.upper())
+    for token in tokens:
+        if token not in ALPHABET and token not in (WILDCARD, GAP):
+            raise ValueError(f"bad pattern character {token!r}: use letters, '{WILDCARD}' and '{GAP}'")
+    return tokens
+
+
+class WordFinder:
+    """A memory-mapped word finder; see build_word_finder for the layout."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, checksum, word_count, blob_size, longest = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a word finder index")
+        self.checksum = checksum
+        self.longest = longest
+        self._count = word_count
+        self._width = (word_count + 7) // 8
+        view = memoryview(self._mmap)
+        offset = HEADER.size
+        self._offsets = view[offset:offset + 4 * (word_count + 1)].cast("I")
+        offset += 4 * (word_count + 1)
+        self._blob_offset = offset
+        self._bitmaps_offset = offset + blob_size
+
+    def __reduce__(self):
+        return (open_word_finder, (self.path,))
+
+    def __len__(self):
+        return self._count
+
+    def _bitmap(self, index):
+        start = self._bitmaps_offset + index * self._width
+        return int.from_bytes(self._mmap[start:start + self._width], "little")
+
+    def _word(self, word_id):
+        start = self._blob_offset
+        return self._mmap[start + self._offsets[word_id]:start + self._offsets[word_id + 1]].decode()
+
+    def _candidates(self, tokens, low, high, excluded, blanks):
+        """
+        ANDs together the bitmaps a match must be in and returns the result.
+        Words using more than blanks of the excluded letters are left out.
+        """
+        longest = self.longest
+        mask = 0
+        for length in range(low, high + 1):
+            mask |= self._bitmap(length)
+        gaps = [i for i, token in enumerate(tokens) if token == GAP]
+        first, last = (gaps[0], gaps[-1]) if gaps else (len(tokens), len(tokens))
+        for pos, token in enumerate(tokens[:first]):
+            if token in ALPHABET and mask:
+                mask &= self._bitmap(_start_bitmap(longest, pos, ALPHABET.index(token)))
+        for pos, token in enumerate(reversed(tokens[last + 1:])):
+            if token in ALPHABET and mask:
+                mask &= self._bitmap(_end_bitmap(longest, pos, ALPHABET.index(token)))
+        for token in set(tokens[first + 1:last]):
+            if token in ALPHABET and mask:
+                mask &= self._bitmap(_contains_bitmap(longest, ALPHABET.index(token)))
+        # over[k] holds the words with more than k of the excluded letters.
+        over = [0] * (blanks + 1)
+        for letter in excluded:
+            if not mask:
+                break
+            bits = self._bitmap(_contains_bitmap(longest, ALPHABET.index(letter))) & mask
+            for k in range(blanks, 0, -1):
+                over[k] |= over[k - 1] & bits
+            over[0] |= bits
+        return mask & ~over[blanks]
+
+    def find(self, pattern, rack=None, min_length=MIN_LENGTH, max_length=None):
+        """
+        Yields the words matching pattern, in alphabetical order, with
+        between min_length and max_length letters. With a rack, every
+        letter the wildcards stand for must come from it ('@' for a blank
+        covers any one letter), as when playing through fixed tiles.
+        """
+        if instrument.enabled:
+            instrument.count("finder.queries")
+        tokens = parse_pattern(pattern)
+        letters = [token for token in tokens if token in ALPHABET]
+        fixed = len(tokens) - tokens.count(GAP)
+        low = max(min_length, fixed, 1)
+        high = min(max_length or self.longest, self.longest if GAP in tokens else fixed)
+        counts, blanks, excluded = None, 0, ()
+        if rack is not None:
+            counts = {}
+            for tile in rack.upper():
+                if tile == BLANK:
+                    blanks += 1
+                else:
+                    counts[tile] = counts.get(tile, 0) + 1
+            high = min(high, len(letters) + len(rack))
+            excluded = [letter for letter in ALPHABET if letter not in counts and letter not in letters]
+        if low > high:
+            return
+
+        matcher = re.compile("".join(
+            "." if token == WILDCARD else ".*" if token == GAP else token for token in tokens
+        ))
+        mask = self._candidates(tokens, low, high, excluded, blanks)
+        data = mask.to_bytes(self._width, "little")
+        for found in re.finditer(b"[^\0]", data):
+            byte_index, byte = found.start(), data[found.start()]
+            while byte:
+                low_bit = byte & -byte
+                byte ^= low_bit
+                word = self._word(8 * byte_index + low_bit.bit_length() - 1)
+                if matcher.fullmatch(word) and (counts is None or _fits_rack(word, letters, counts, blanks)):
+                    yield word
+
+
+def _fits_rack(word, letters, counts, blanks):
+    """
+    Checks whether the letters of word beyond the pattern's fixed letters
+    can all come from the rack. Every fixed letter matches exactly one
+    letter of the word, so which ones are left over doesn't depend on how
+    the pattern lines up.
+    """
+    needed = {}
+    for letter in word:
+        needed[letter] = needed.get(letter, 0) + 1
+    for letter in letters:
+        needed[letter] -= 1
+    short = sum(max(0, n - counts.get(letter, 0)) for letter, n in needed.items())
+    return short <= blanks
+
+
+def open_word_finder(path):
+    """Opens a word finder index, sharing one instance per path per process."""
+    return open_mapped(path, WordFinder)
+
+
+def load_word_finder(lexicon=None, cache_file=None):
+    """
+    Returns the word finder for lexicon, building and caching its index
+    next to the lexicon file first if it is missing or out of date.
+    """
+    lexicon = lexicon or get_lexicon()
+    cache_file = cache_file or os.path.splitext(lexicon.path)[0] + ".finder"
+    return load_mapped(cache_file, WordFinder, MAGIC, VERSION, lexicon.checksum, partial(build_word_finder, lexicon))
+
+
+def get_word_finder():
+    """Returns the word finder for the shared lexicon."""
+    return load_word_finder()
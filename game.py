@@ -1,21 +1,17 @@
 import random
-import itertools  
 from board import create_board, print_board, is_valid_move, place_word
-from tiles import TILE_BAG, draw_tiles
+from tiles import TileBag, draw_tiles
 from player import Player
+from lexicon import get_lexicon
+from anagram import get_anagram_index
 
-def load_wordlist():
-    """Loads the wordlist from a file."""
-    with open("wordlist.txt", "r") as file:
-        return set(word.strip().upper() for word in file)
-
-WORDLIST = load_wordlist()  
+WORDLIST = get_lexicon()
 
 def play_game():
     """Main game loop."""
     # Initialize board and players
     board = create_board()
-    tile_bag = TILE_BAG.copy()
+    tile_bag = TileBag()
     players = [Player("Human"), Player("Computer")]
 
     # Draw initial tiles for both players
@@ -32,8 +28,8 @@ def play_game():
         if player.name == "Human":
             # Human turn
             word = input("Enter a word: ").upper()
-            start_row = int(input("Enter start row (0-14): "))
-            start_col = int(input("Enter start column (0-14): "))
+            start_row = int(input(f"Enter start row (0-{len(board) - 1}): "))
+            start_col = int(input(f"Enter start column (0-{len(board) - 1}): "))
             direction = input("Direction (H/V): ").upper()
 
             if is_valid_move(board, word, start_row, start_col, direction):
@@ -45,7 +41,7 @@ def play_game():
         else:
             # Computer turn
             print("Computer is thinking...")
-            computer_turn(board, player)
+            computer_turn(board, player, tile_bag)
 
         # Replenish tiles after the turn (only if there are tiles in the bag)
         if tile_bag:
@@ -63,8 +59,9 @@ def play_game():
 def update_rack(player_rack, word):
     """Updates the player's rack after a word is played."""
     for letter in word:
-        if letter in player_rack:
-            player_rack.remove(letter)
+        tile = "@" if letter.islower() else letter
+        if tile in player_rack:
+            player_rack.remove(tile)
     return player_rack
 
     # game.py (or similar file handling game logic)
@@ -88,7 +85,7 @@ def play_turn(player_tiles):
     word = input("Enter the word to play: ").upper()
     return word, player_tiles
 
-def computer_turn(board, computer_player):
+def computer_turn(board, computer_player, tile_bag):
     """Determines and plays the computer's move."""
     print(f"{computer_player.name}'s turn:")
     
@@ -97,13 +94,13 @@ def computer_turn(board, computer_player):
     
     if not possible_words:
         print("Computer can't form any words, swapping tiles...")
-        swap_tiles(computer_player.rack)
+        swap_tiles(computer_player.rack, tile_bag)
         return
     
     for word in possible_words:
         if is_valid_word(word):  
-            for row in range(15):
-                for col in range(15):
+            for row in range(len(board)):
+                for col in range(len(board)):
                     for direction in ['H', 'V']:
                         if is_valid_move(board, word, row, col, direction):
                             place_word(board, word, row, col, direction)
@@ -113,24 +110,15 @@ def computer_turn(board, computer_player):
     print("Computer could not play a word this turn.")
 
 def generate_possible_words(rack):
-    """Generates possible valid words from the player's rack using permutations."""
-    possible_words = set()
-    for i in range(2, 8):  
-        for combo in itertools.permutations(rack, i):
-            word = ''.join(combo).upper()
-            if word in WORDLIST:  
-                possible_words.add(word)
-    return list(possible_words)
+    """Generates possible valid words from the player's rack using the anagram index."""
+    return get_anagram_index().words_from_rack(rack)
 
 def is_valid_word(word):
     return word in WORDLIST 
 
-def swap_tiles(rack):
+def swap_tiles(rack, tile_bag):
     print("Swapping tiles...")
-    global TILE_BAG
-    for _ in range(min(7, len(rack))):
-        TILE_BAG.append(rack.pop())  
-    rack += draw_tiles(TILE_BAG, 7 - len(rack))  
+    rack[:] = tile_bag.exchange(rack)
 
 def play_turn(player_tiles):
     print(f"Your current tiles: {player_tiles}")
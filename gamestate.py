@@ -0,0 +1,99 @@
+"""
+Incremental game state for lookahead. Moves are applied in place and
+each pushes a compact undo record, so a search can walk millions of
+positions by playing and taking back moves instead of copying boards.
+"""
+from movegen import generate_moves, tiles_used
+from scoring import score_move
+
+RACK_SIZE = 7
+
+
+class GameState:
+    """
+    The board, the players (with their racks and scores), the tile bag,
+    whose turn it is, the first-move flag and the run of consecutive
+    passes. play() and pass_turn() push onto an undo stack; undo() pops
+    it and restores everything in O(tiles placed).
+    """
+
+    __slots__ = ("board", "players", "tile_bag", "turn", "first_move", "passes", "_history")
+
+    def __init__(self, board, players, tile_bag, turn=0, first_move=None):
+        self.board = board
+        self.players = players
+        self.tile_bag = tile_bag
+        self.turn = turn
+        self.first_move = board.is_empty() if first_move is None else first_move
+        self.passes = 0
+        self._history = []
+
+    def __len__(self):
+        """The number of moves that can be undone."""
+        return len(self._history)
+
+    @property
+    def player(self):
+        """The player to move."""
+        return self.players[self.turn]
+
+    def moves(self):
+        """Returns every legal (word, row, col, direction) for the player to move."""
+        return generate_moves(self.board, self.player.rack, self.board.lexicon)
+
+    def is_over(self):
+        """Checks whether a player has gone out with an empty bag, or everyone passed in a row."""
+        if not self.tile_bag and any(not player.rack for player in self.players):
+            return True
+        return self.passes >= len(self.players)
+
+    def play(self, word, start_row, start_col, direction):
+        """
+        Plays a legal move for the player to move: places it, scores it,
+        takes its tiles from the rack and refills the rack from the bag.
+        Returns the score.
+        """
+        board = self.board
+        player = self.players[self.turn]
+        used = tiles_used(board, word, start_row, start_col, direction)
+        score = score_move(board, word, start_row, start_col, direction)
+        undo = []
+        placed = board.place(word, start_row, start_col, direction, undo)
+
+        rack = player.rack
+        removed = []
+        for tile in used:
+            index = rack.index(tile)
+            removed.append((index, tile))
+            del rack[index]
+        drawn = self.tile_bag.draw(RACK_SIZE - len(rack))
+        rack += drawn
+        player.score += score
+
+        self._history.append((self.turn, placed, undo, removed, len(drawn), score, self.first_move, self.passes))
+        self.first_move = False
+        self.passes = 0
+        self.turn = (self.turn + 1) % len(self.players)
+        return score
+
+    def pass_turn(self):
+        """Passes for the player to move."""
+        self._history.append((self.turn, None, None, (), 0, 0, self.first_move, self.passes))
+        self.passes += 1
+        self.turn = (self.turn + 1) % len(self.players)
+
+    def undo(self):
+        """Takes back the last play() or pass_turn()."""
+        turn, placed, undo, removed, drawn, score, first_move, passes = self._history.pop()
+        player = self.players[turn]
+        if placed is not None:
+            self.board.unplace(placed, undo)
+        if drawn:
+            del player.rack[-drawn:]
+            self.tile_bag.undraw(drawn)
+        for index, tile in reversed(removed):
+            player.rack.insert(index, tile)
+        player.score -= score
+        self.turn = turn
+        self.first_move = first_move
+        self.passes = passes
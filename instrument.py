@@ -0,0 +1,71 @@
+"""
+Opt-in instrumentation: event counters on the hot paths and per-turn
+wall times, summarised as JSON.
+
+Every call site guards its update with `if instrument.enabled:`, so while
+instrumentation is off (the default) the cost is one global lookup.
+"""
+import json
+import sys
+import time
+from collections import Counter
+
+enabled = False
+counters = Counter()
+turns = []
+_turn = None
+
+
+def enable():
+    """Starts recording counters and turn timings."""
+    global enabled
+    enabled = True
+
+
+def count(name, n=1):
+    """Adds n to the counter name. Callers check `enabled` first."""
+    counters[name] += n
+
+
+def begin_turn(player):
+    """Marks the start of a turn by player (a name)."""
+    global _turn
+    if enabled:
+        _turn = (player, time.perf_counter(), counters.copy())
+
+
+def end_turn():
+    """Records the wall time and counter deltas of the turn begun last."""
+    global _turn
+    if enabled and _turn is not None:
+        player, started, before = _turn
+        turns.append({
+            "turn": len(turns) + 1,
+            "player": player,
+            "seconds": round(time.perf_counter() - started, 6),
+            "counters": dict(counters - before),
+        })
+        _turn = None
+
+
+def summary():
+    """Returns the totals, the slowest turn and every turn's record."""
+    seconds = [turn["seconds"] for turn in turns]
+    return {
+        "turns": len(turns),
+        "total_seconds": round(sum(seconds), 6),
+        "mean_turn_seconds": round(sum(seconds) / len(seconds), 6) if seconds else None,
+        "slowest_turn": max(turns, key=lambda turn: turn["seconds"])["turn"] if turns else None,
+        "counters": dict(sorted(counters.items())),
+        "per_turn": turns,
+    }
+
+
+def write_summary(out="-"):
+    """Writes summary() as JSON to out (a path, or "-" for stderr)."""
+    text = json.dumps(summary(), indent=2) + "\n"
+    if out == "-":
+        sys.stderr.write(text)
+    else:
+        with open(out, "w") as f:
+            f.write(text)
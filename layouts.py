@@ -0,0 +1,91 @@
+"""
+Board layouts: how big the board is, where its premium squares are and
+which tiles go in the bag. A game picks its layout when it starts; after
+that everything reads the size and premiums off the board itself.
+"""
+from tiles import TILE_BAG
+
+# Premium squares are stored apart from the tiles, one byte per square.
+PREMIUM_NAMES = ("", "DL", "TL", "DW", "TW")
+PREMIUM_CODES = {name: code for code, name in enumerate(PREMIUM_NAMES) if name}
+
+SPECIAL_TILES = {
+    "TW": [(0, 0), (0, 7), (0, 14), (7, 0), (7, 14), (14, 0), (14, 7), (14, 14)],
+    "DW": [
+        (1, 1), (1, 13), (2, 2), (2, 12), (3, 3), (3, 11), (4, 4), (4, 10), (7, 7),
+        (10, 4), (10, 10), (11, 3), (11, 11), (12, 2), (12, 12), (13, 1), (13, 13)
+    ],
+    "TL": [
+        (1, 5), (1, 9), (5, 1), (5, 5), (5, 9), (5, 13),
+        (9, 1), (9, 5), (9, 9), (9, 13), (13, 5), (13, 9)
+    ],
+    "DL": [
+        (0, 3), (0, 11), (2, 6), (2, 8), (3, 0), (3, 7), (3, 14),
+        (6, 2), (6, 6), (6, 8), (6, 12), (7, 3), (7, 11), (8, 2),
+        (8, 6), (8, 8), (8, 12), (11, 0), (11, 7), (11, 14),
+        (12, 6), (12, 8), (14, 3), (14, 11)
+    ]
+}
+
+# Premium squares of the 21x21 board, given for the top-left quarter
+# (rows and columns 0-10); symmetric() mirrors them over the whole board.
+SUPER_QUARTER = {
+    "TW": [(0, 0), (0, 10)],
+    "DW": [(1, 1), (2, 2), (3, 3), (4, 4), (5, 5), (10, 10)],
+    "TL": [(1, 7), (5, 9), (7, 7)],
+    "DL": [(0, 4), (2, 8), (3, 6), (4, 10), (6, 3), (8, 8), (9, 9)],
+}
+
+SUPER_TILE_BAG = {
+    "A": 16, "B": 4, "C": 6, "D": 8, "E": 24, "F": 4, "G": 5, "H": 5, "I": 13,
+    "J": 2, "K": 2, "L": 7, "M": 6, "N": 13, "O": 15, "P": 4, "Q": 2, "R": 13,
+    "S": 10, "T": 15, "U": 7, "V": 3, "W": 4, "X": 2, "Y": 4, "Z": 2, "@": 4
+}
+
+
+def premium_layer(size, special_tiles):
+    """Builds the row-major premium table for a board from {name: squares}."""
+    layer = bytearray(size * size)
+    for name, positions in special_tiles.items():
+        for row, col in positions:
+            layer[row * size + col] = PREMIUM_CODES[name]
+    return bytes(layer)
+
+
+def symmetric(size, quarter):
+    """Mirrors {name: squares} across the diagonal and both centre lines of a size x size board."""
+    last = size - 1
+    squares = {}
+    for name, positions in quarter.items():
+        mirrored = set()
+        for row, col in positions:
+            for r, c in ((row, col), (col, row)):
+                mirrored.update({(r, c), (r, last - c), (last - r, c), (last - r, last - c)})
+        squares[name] = sorted(mirrored)
+    return squares
+
+
+class Layout:
+    """A board size with its premium squares and the tile distribution of its bag."""
+
+    __slots__ = ("name", "size", "special_tiles", "distribution", "premiums")
+
+    def __init__(self, name, size, special_tiles, distribution):
+        self.name = name
+        self.size = size
+        self.special_tiles = special_tiles
+        self.distribution = distribution
+        self.premiums = premium_layer(size, special_tiles)
+
+    def __repr__(self):
+        return f"Layout({self.name!r}, {self.size}x{self.size}, {sum(self.distribution.values())} tiles)"
+
+
+STANDARD = Layout("standard", 15, SPECIAL_TILES, TILE_BAG)
+SUPER = Layout("super", 21, symmetric(21, SUPER_QUARTER), SUPER_TILE_BAG)
+LAYOUTS = {layout.name: layout for layout in (STANDARD, SUPER)}
+
+
+def layout_for_size(size):
+    """Returns the layout for a board of size squares a side, or None if there is none."""
+    return next((layout for layout in LAYOUTS.values() if layout.size == size), None)
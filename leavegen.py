@@ -0,0 +1,107 @@
+"""
+Learns rack-leave values from self-play and writes them as a leave table
+(see leaves.py).
+
+Each worker plays quick games in which both sides take the move with the
+best static equity under the current leave values (now and then one of
+the next best, to see more leaves). Whenever a move leaves tiles on the
+rack with tiles still in the bag, the leave is credited with the score
+of that player's next move. A leave's value is how far its average next score sits above the
+average over all leaves, shrunk towards the heuristic value when it has
+only a few samples.
+"""
+import json
+import random
+import sys
+import time
+
+from board import append_special_tiles, create_board
+from gamestate import GameState
+from leaves import LEAVE_TABLE, MAX_LEAVE, heuristic_leave_value, write_leave_table
+from player import Player
+from pool import lexicon_pool, worker_lexicon
+from search import rank_moves
+from tiles import TileBag, draw_tiles
+
+EXPLORE = 0.1      # chance of playing one of the next best moves instead of the best
+EXPLORE_TOP = 5
+PRIOR_SAMPLES = 8  # samples' worth of weight given to the heuristic value
+
+def play_leave_games(seeds, lexicon=None):
+    """
+    Plays a game per seed and returns ({leave: [total next score, samples]},
+    total next score, samples), leaves being strings of sorted tiles.
+    """
+    lexicon = lexicon or worker_lexicon()
+    stats = {}
+    total = samples = 0
+    for seed in seeds:
+        rng = random.Random(seed)
+        tile_bag = TileBag(seed=seed)
+        board = append_special_tiles(create_board(lexicon))
+        players = [Player("Computer 1"), Player("Computer 2")]
+        for player in players:
+            player.rack = draw_tiles(tile_bag, 7)
+        state = GameState(board, players, tile_bag, rng.randrange(2))
+        pending = [None] * len(players)
+        while not state.is_over():
+            turn = state.turn
+            ranked = rank_moves(board, state.player.rack, state.moves())
+            if not ranked:
+                state.pass_turn()
+                score, leave = 0, None
+            else:
+                pick = rng.randrange(min(EXPLORE_TOP, len(ranked))) if rng.random() < EXPLORE else 0
+                _, _, move, leave = ranked[pick]
+                score = state.play(*move)
+            if pending[turn] is not None:
+                entry = stats.setdefault(pending[turn], [0, 0])
+                entry[0] += score
+                entry[1] += 1
+                total += score
+                samples += 1
+            pending[turn] = "".join(sorted(leave)) if leave and tile_bag and len(leave) <= MAX_LEAVE else None
+    return stats, total, samples
+
+
+def leave_values(stats, total, samples, prior_samples=PRIOR_SAMPLES):
+    """Turns the merged results of play_leave_games into {leave: value}."""
+    average = total / samples if samples else 0.0
+    values = {}
+    for leave, (leave_total, count) in stats.items():
+        observed = leave_total / count - average
+        values[leave] = (count * observed + prior_samples * heuristic_leave_value(leave)) / (count + prior_samples)
+    return values
+
+
+def run_leavegen(games, seed=0, workers=None, out=LEAVE_TABLE, games_per_task=10):
+    """
+    Plays games self-play games (seeds seed..seed+games-1) on a pool of
+    workers and writes the leave table learned from them to out. Prints
+    a JSON summary and returns the values.
+    """
+    seeds = list(range(seed, seed + games))
+    batches = [seeds[i:i + games_per_task] for i in range(0, len(seeds), games_per_task)]
+    stats = {}
+    total = samples = 0
+    started = time.perf_counter()
+    with lexicon_pool(workers) as pool:
+        for batch_stats, batch_total, batch_samples in pool.imap_unordered(play_leave_games, batches):
+            for leave, (leave_total, count) in batch_stats.items():
+                entry = stats.setdefault(leave, [0, 0])
+                entry[0] += leave_total
+                entry[1] += count
+            total += batch_total
+            samples += batch_samples
+    values = leave_values(stats, total, samples)
+    write_leave_table(values, out)
+    json.dump({
+        "games": games,
+        "samples": samples,
+        "leaves": len(values),
+        "average_next_score": round(total / samples, 3) if samples else None,
+        "wall_time": round(time.perf_counter() - started, 3),
+        "table": out,
+    }, sys.stdout)
+    sys.stdout.write("\n")
+    return values
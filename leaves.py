@@ -0,0 +1,141 @@
+"""
+Rack-leave evaluation: an estimate, in points, of how much the tiles a
+player keeps after a move are worth on later turns.
+
+Values come from a leave table learned by self-play (see leavegen.py)
+when one exists, and from per-tile heuristics otherwise. The table holds
+a float32 for every multiset of 1 to MAX_LEAVE tiles over the 27 tile
+kinds, at the multiset's rank in the combinatorial number system, so a
+lookup is a sort of at most six tiles and one read from the mapped file.
+Leaves self-play never saw are stored as NaN and fall back to the
+heuristics.
+"""
+import math
+import mmap
+import os
+import struct
+from array import array
+
+from lexicon import ALPHABET
+
+BLANK = "@"
+VOWELS = frozenset("AEIOU")
+
+# Rough per-tile worth of keeping a tile, from common Scrabble heuristics.
+TILE_LEAVE_VALUES = {
+    "@": 25.0, "S": 8.0, "X": 3.5, "Z": 3.0, "R": 1.5, "H": 1.0, "E": 1.0,
+    "A": 0.5, "C": 0.5, "D": 0.5, "L": 0.5, "M": 0.5, "N": 0.5, "T": 0.5,
+    "I": -0.5, "K": -0.5, "P": -0.5, "Y": -0.5, "O": -1.0, "J": -1.5,
+    "B": -2.0, "F": -2.0, "G": -2.0, "U": -3.0, "W": -3.0, "V": -5.5, "Q": -7.0,
+}
+DUPLICATE_PENALTY = 2.5
+
+
+MAX_LEAVE = 6
+TILE_KINDS = ALPHABET + BLANK
+TILE_CODES = {tile: code for code, tile in enumerate(TILE_KINDS)}
+# BINOMIAL[n][k] for every n and k a leave's rank can need.
+BINOMIAL = [[math.comb(n, k) for k in range(MAX_LEAVE + 1)] for n in range(len(TILE_KINDS) + MAX_LEAVE)]
+# Leaves of each size take one contiguous block of ids, smallest first.
+LEAVE_OFFSETS = [0]
+for size in range(1, MAX_LEAVE + 1):
+    LEAVE_OFFSETS.append(LEAVE_OFFSETS[-1] + BINOMIAL[len(TILE_KINDS) + size - 1][size])
+LEAVE_COUNT = LEAVE_OFFSETS[-1]
+
+LEAVE_TABLE = "leaves.table"
+MAGIC = b"SCRBLEAV"
+VERSION = 1
+HEADER = struct.Struct("<8sIBI")
+
+_table = False  # not looked for yet
+
+
+def leave_id(leave):
+    """
+    Returns the table index of a leave of 1 to MAX_LEAVE tiles. Sorted
+    codes a0 <= a1 <= ... become the strictly increasing ai + i, whose
+    combinatorial-number-system rank is unique within the leave's size.
+    """
+    codes = sorted(TILE_CODES[tile.upper()] for tile in leave)
+    rank = LEAVE_OFFSETS[len(codes) - 1]
+    for i, code in enumerate(codes):
+        rank += BINOMIAL[code + i][i + 1]
+    return rank
+
+
+def write_leave_table(values, path=LEAVE_TABLE):
+    """Writes a leave table from {leave: value}; leaves left out are stored as NaN."""
+    table = array("f", [math.nan]) * LEAVE_COUNT
+    for leave, value in values.items():
+        table[leave_id(leave)] = value
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, MAX_LEAVE, LEAVE_COUNT))
+        table.tofile(f)
+    os.replace(tmp_path, path)
+
+
+class LeaveTable:
+    """A memory-mapped leave table; see write_leave_table for the layout."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, max_leave, count = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != VERSION or max_leave != MAX_LEAVE or count != LEAVE_COUNT:
+            raise ValueError(f"{path} is not a leave table")
+        self._values = memoryview(self._mmap)[HEADER.size:HEADER.size + 4 * count].cast("f")
+
+    def __reduce__(self):
+        return (LeaveTable, (self.path,))
+
+    def __len__(self):
+        return len(self._values)
+
+    def value(self, leave):
+        """Returns the learned value of leave, or None if there is none."""
+        if not 0 < len(leave) <= MAX_LEAVE:
+            return None
+        value = self._values[leave_id(leave)]
+        return None if math.isnan(value) else value
+
+
+def load_leave_table(path=LEAVE_TABLE):
+    """
+    Maps the leave table at path for leave_value() to use, or goes back to
+    the heuristics if there is no such file. Returns the table or None.
+    """
+    global _table
+    _table = LeaveTable(path) if os.path.exists(path) else None
+    return _table
+
+
+def leave_value(leave):
+    """Estimates the worth of the tiles in leave (a list of rack tiles)."""
+    table = load_leave_table() if _table is False else _table
+    if table is not None:
+        value = table.value(leave)
+        if value is not None:
+            return value
+    return heuristic_leave_value(leave)
+
+
+def heuristic_leave_value(leave):
+    """Estimates the worth of the tiles in leave from per-tile heuristics."""
+    leave = [tile.upper() for tile in leave]
+    value = sum(TILE_LEAVE_VALUES[tile] for tile in leave)
+    seen = set()
+    for tile in leave:
+        if tile in seen and tile != BLANK:
+            value -= DUPLICATE_PENALTY
+        seen.add(tile)
+    vowels = sum(tile in VOWELS for tile in leave)
+    consonants = len(leave) - vowels - leave.count(BLANK)
+    if vowels > consonants + 1:
+        value -= 2.0 * (vowels - consonants - 1)
+    elif consonants > vowels + 2:
+        value -= 1.5 * (consonants - vowels - 2)
+    if "Q" in seen and "U" not in seen and BLANK not in seen:
+        value -= 3.0
+    return value
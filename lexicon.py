@@ -0,0 +1,383 @@
+import functools
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+
+import instrument
+
+ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+ALL_LETTERS = (1 << len(ALPHABET)) - 1
+
+# File layout: a fixed header followed by a flat array of 32-bit edges.
+# Each edge packs the letter (bits 0-4), a "word ends here" flag (bit 5),
+# a "last edge of this node" flag (bit 6) and the offset of the child
+# node's first edge (bits 7-31). Offset 0 is a sentinel for "no children".
+MAGIC = b"SCRBDAWG"
+VERSION = 1
+HEADER = struct.Struct("<8sI32sIII")
+TERMINAL = 1 << 5
+LAST = 1 << 6
+CHILD_SHIFT = 7
+CHILDREN_CACHE_SIZE = 1 << 13
+
+# Every memory-mapped file (the lexicon and the indexes built from it)
+# starts with its magic, format version and the checksum of its sources.
+MAPPED_HEADER = struct.Struct("<8sI32s")
+
+_mapped = {}
+_mapped_lock = threading.Lock()
+_checksums = {}
+_shared = None
+
+
+class _Node:
+    __slots__ = ("edges", "final", "id")
+
+    def __init__(self, node_id):
+        self.edges = {}
+        self.final = False
+        self.id = node_id
+
+
+def source_checksum(*filenames):
+    """Returns the SHA-256 digest of the given source files, in order."""
+    digest = hashlib.sha256()
+    for filename in filenames:
+        with open(filename, "rb") as f:
+            digest.update(f.read())
+        digest.update(b"\0")
+    return digest.digest()
+
+
+def _cached_checksum(*filenames):
+    """Like source_checksum, but only re-hashes files whose size or mtime changed."""
+    key = tuple((os.path.abspath(name), st.st_size, st.st_mtime_ns)
+                for name, st in ((name, os.stat(name)) for name in filenames))
+    checksum = _checksums.get(key)
+    if checksum is None:
+        checksum = _checksums[key] = source_checksum(*filenames)
+    return checksum
+
+
+def write_checksums(filenames, checksum_file):
+    """Records the SHA-256 of each file in sha256sum format."""
+    with open(checksum_file, "w") as f:
+        for filename in filenames:
+            with open(filename, "rb") as source:
+                f.write(f"{hashlib.sha256(source.read()).hexdigest()}  {filename}\n")
+
+
+def verify_checksums(checksum_file):
+    """
+    Checks the files listed in a sha256sum-format file.
+    Returns the names of the files that are missing or don't match.
+    """
+    failed = []
+    with open(checksum_file) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            expected, filename = line.split(None, 1)
+            filename = filename.strip().lstrip("*")
+            try:
+                with open(filename, "rb") as source:
+                    actual = hashlib.sha256(source.read()).hexdigest()
+            except OSError:
+                actual = None
+            if actual != expected:
+                failed.append(filename)
+    return failed
+
+
+def read_words(*filenames):
+    """Reads, normalises and de-duplicates the words from the given files."""
+    words = set()
+    for filename in filenames:
+        with open(filename) as f:
+            for line in f:
+                word = line.strip().upper()
+                if word and all(letter in ALPHABET for letter in word):
+                    words.add(word)
+    return sorted(words)
+
+
+def build_dawg(words):
+    """
+    Builds a minimal DAWG from sorted words (Daciuk et al.) and returns
+    it flattened into the packed edge array described above.
+    """
+    counter = [0]
+
+    def new_node():
+        counter[0] += 1
+        return _Node(counter[0])
+
+    root = new_node()
+    unchecked = []
+    minimized = {}
+
+    def minimize(down_to):
+        while len(unchecked) > down_to:
+            parent, letter, child = unchecked.pop()
+            key = (child.final, tuple((l, n.id) for l, n in sorted(child.edges.items())))
+            if key in minimized:
+                parent.edges[letter] = minimized[key]
+            else:
+                minimized[key] = child
+
+    previous = ""
+    for word in words:
+        common = 0
+        for a, b in zip(word, previous):
+            if a != b:
+                break
+            common += 1
+        minimize(common)
+        node = unchecked[-1][2] if unchecked else root
+        for letter in word[common:]:
+            child = new_node()
+            node.edges[letter] = child
+            unchecked.append((node, letter, child))
+            node = child
+        node.final = True
+        previous = word
+    minimize(0)
+
+    # Lay out one contiguous block of edges per distinct node.
+    edges = array("I", [0])
+    offsets = {}
+
+    def layout(node):
+        if not node.edges:
+            return 0
+        if node.id in offsets:
+            return offsets[node.id]
+        children = sorted(node.edges.items())
+        child_offsets = [layout(child) for _, child in children]
+        offset = len(edges)
+        offsets[node.id] = offset
+        for i, ((letter, child), child_offset) in enumerate(zip(children, child_offsets)):
+            edge = ALPHABET.index(letter) | (child_offset << CHILD_SHIFT)
+            if child.final:
+                edge |= TERMINAL
+            if i == len(children) - 1:
+                edge |= LAST
+            edges.append(edge)
+        return offset
+
+    return edges, layout(root)
+
+
+def compile_lexicon(sources, path):
+    """Compiles the source word lists into a binary DAWG file at path."""
+    words = read_words(*sources)
+    edges, root = build_dawg(words)
+    if sys.byteorder != "little":
+        edges.byteswap()
+    checksum = source_checksum(*sources)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, checksum, len(words), len(edges), root))
+        edges.tofile(f)
+    os.replace(tmp_path, path)
+    return checksum
+
+
+class Lexicon:
+    """
+    A read-only word list backed by a memory-mapped DAWG file.
+    Supports membership, prefix queries and ordered iteration.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, checksum, count, edge_count, root = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a compiled lexicon")
+        self.checksum = checksum
+        self.root = root
+        self._count = count
+        self._edges = memoryview(self._mmap)[HEADER.size:HEADER.size + 4 * edge_count].cast("I")
+        self._children = {}
+
+    def __reduce__(self):
+        # Worker processes re-open (and share) the same mapped file.
+        return (open_lexicon, (self.path,))
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, word):
+        return self.is_word(word)
+
+    def __iter__(self):
+        return self.words()
+
+    def children(self, node):
+        """
+        Returns {letter: (child, terminal)} for the outgoing edges of node.
+        Recently decoded nodes are cached, so hot paths mostly pay for a
+        dict lookup; the cache is bounded, so a long run (or a full walk)
+        doesn't keep a decoded copy of the whole DAWG in every process.
+        """
+        children = self._children.get(node)
+        if children is None:
+            children = {}
+            if node:
+                edges = self._edges
+                i = node
+                while True:
+                    edge = edges[i]
+                    children[ALPHABET[edge & 31]] = (edge >> CHILD_SHIFT, bool(edge & TERMINAL))
+                    if edge & LAST:
+                        break
+                    i += 1
+            if len(self._children) >= CHILDREN_CACHE_SIZE:
+                self._children.clear()
+            self._children[node] = children
+        return children
+
+    def walk(self, letters, node=None):
+        """
+        Follows letters from node (the root by default).
+        Returns (node, terminal), or None if the path leaves the DAWG.
+        """
+        if instrument.enabled:
+            instrument.count("lexicon.lookups")
+        node = self.root if node is None else node
+        terminal = False
+        for letter in letters:
+            edge = self.children(node).get(letter)
+            if edge is None:
+                return None
+            node, terminal = edge
+        return node, terminal
+
+    def is_word(self, word):
+        """Checks whether word is in the lexicon."""
+        found = self.walk(word.upper())
+        return found is not None and found[1] and len(word) > 0
+
+    def has_prefix(self, prefix):
+        """Checks whether any word in the lexicon starts with prefix."""
+        return self.walk(prefix.upper()) is not None
+
+    def words(self, prefix=""):
+        """Yields the words that start with prefix, in alphabetical order."""
+        prefix = prefix.upper()
+        found = self.walk(prefix)
+        if found is None:
+            return
+        stack = [(found[0], prefix, found[1] and bool(prefix))]
+        while stack:
+            node, word, terminal = stack.pop()
+            if terminal:
+                yield word
+            for letter, (child, child_terminal) in sorted(self.children(node).items(), reverse=True):
+                stack.append((child, word + letter, child_terminal))
+
+
+def open_mapped(path, reader):
+    """
+    Opens the memory-mapped file at path with reader (a class taking the
+    path), sharing one instance per path per process.
+    """
+    path = os.path.abspath(path)
+    with _mapped_lock:
+        mapped = _mapped.get(path)
+        if mapped is None:
+            mapped = _mapped[path] = reader(path)
+        return mapped
+
+
+def load_mapped(path, reader, magic, version, checksum, build):
+    """
+    Returns open_mapped(path, reader) for a file made from sources with
+    the given checksum, first calling build(path) to write it if it is
+    missing, of another format or version, or made from other sources.
+    reader instances must have the checksum they were opened with.
+    """
+    with _mapped_lock:
+        mapped = _mapped.get(os.path.abspath(path))
+        if mapped is not None and mapped.checksum == checksum:
+            return mapped
+    try:
+        with open(path, "rb") as f:
+            stale = MAPPED_HEADER.unpack(f.read(MAPPED_HEADER.size)) != (magic, version, checksum)
+    except (OSError, struct.error):
+        stale = True
+    if stale:
+        build(path)
+        with _mapped_lock:
+            _mapped.pop(os.path.abspath(path), None)
+    return open_mapped(path, reader)
+
+
+def open_lexicon(path):
+    """Opens a compiled lexicon, sharing one instance per path per process."""
+    return open_mapped(path, Lexicon)
+
+
+def load_lexicon(wordlist_file="wordlist.txt", two_letter_file="two_letters.txt", cache_file=None):
+    """
+    Returns the shared lexicon for the given word lists, compiling them
+    into a DAWG cache file first if it is missing or out of date.
+    """
+    sources = [wordlist_file, two_letter_file]
+    cache_file = cache_file or os.path.splitext(wordlist_file)[0] + ".dawg"
+    try:
+        checksum = _cached_checksum(*sources)
+    except FileNotFoundError:
+        # Without the sources a previously compiled cache is still usable.
+        if not os.path.exists(cache_file):
+            raise
+        return open_lexicon(cache_file)
+    return load_mapped(cache_file, Lexicon, MAGIC, VERSION, checksum, functools.partial(compile_lexicon, sources))
+
+
+def get_lexicon():
+    """
+    Returns the lexicon shared by the whole program. It is resolved (and
+    its sources checked) once; later calls just return the same handle.
+    """
+    global _shared
+    if _shared is None:
+        _shared = load_lexicon()
+    return _shared
+
+
+class _BackgroundLoad(threading.Thread):
+    def __init__(self, loader):
+        super().__init__(name="lexicon-loader", daemon=True)
+        self._loader = loader
+        self._result = None
+        self._error = None
+
+    def run(self):
+        try:
+            self._result = self._loader()
+        except BaseException as e:
+            self._error = e
+
+    def result(self):
+        """Waits for the load to finish and returns its result (or raises its error)."""
+        self.join()
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+def load_lexicon_in_background(loader=None):
+    """
+    Starts loader (load_lexicon by default) on a daemon thread and returns
+    a handle whose result() waits for it, so callers can prompt meanwhile.
+    """
+    load = _BackgroundLoad(loader or load_lexicon)
+    load.start()
+    return load
@@ -1,33 +1,64 @@
+import argparse
+import cProfile
+import os
 import random
-import requests
-from board import create_board, append_special_tiles, print_board, is_valid_move, place_word
-from tiles import draw_tiles, TILE_BAG, calculate_score
+from board import create_board, append_special_tiles, print_board, place_word
+from tiles import TileBag, draw_tiles
+from layouts import LAYOUTS, STANDARD
 from player import Player
+from lexicon import get_lexicon, load_lexicon, load_lexicon_in_background, verify_checksums, write_checksums
+from movegen import generate_moves
+from validate import validate_move
+from scoring import score_move
+from leaves import load_leave_table
+from render import say
+import instrument
+
+WORDLIST_URL = "https://github.com/jonbcard/scrabble-bot/raw/master/src/dictionary.txt"
+WORDLIST_FILES = ("wordlist.txt", "two_letters.txt")
+CHECKSUM_FILE = "wordlist.sha256"
+
+# Created on the first endgame, so the solver isn't imported before the game starts.
+endgame_solver = None
 
 def download_wordlist(url, filename="wordlist.txt"):
     """Downloads a wordlist from the given URL and saves it to a file."""
     try:
+        import requests
+
         response = requests.get(url)
         response.raise_for_status()
         with open(filename, "w") as f:
             f.write(response.text)
+        write_checksums(WORDLIST_FILES, CHECKSUM_FILE)
         print(f"Wordlist downloaded and saved as '{filename}'.")
     except Exception as e:
         print(f"Error downloading wordlist: {e}")
 
-def load_wordlist(filename="wordlist.txt"):
-    """Loads the wordlist from a file."""
-    with open(filename) as f:
-        return set(word.strip().upper() for word in f)
+def load_checked_wordlist():
+    """
+    Verifies the local wordlists against their stored checksums and loads
+    the lexicon. Returns (lexicon, names of files that failed the check).
+    """
+    try:
+        failed = verify_checksums(CHECKSUM_FILE)
+    except FileNotFoundError:
+        failed = [CHECKSUM_FILE]
+    return load_wordlist(), failed
+
+def load_wordlist(filename="wordlist.txt", two_letter_file="two_letters.txt"):
+    """Loads the shared, compiled lexicon for the wordlist files."""
+    return load_lexicon(filename, two_letter_file)
 
 def is_valid_word(word, wordlist_file="wordlist.txt", two_letter_file="two_letters.txt"):
-    """Checks if a word is valid using the downloaded wordlist and a two-letter word list."""
+    """
+    Checks if a word is valid using the downloaded wordlist and a two-letter word list.
+    The default lists are looked up in the shared lexicon, resolved once.
+    """
     try:
-        with open(wordlist_file) as f:
-            valid_words = set(line.strip().upper() for line in f)
-        with open(two_letter_file) as f:
-            valid_two_letter_words = set(line.strip().upper() for line in f)
-        return word in valid_words or word in valid_two_letter_words
+        if (wordlist_file, two_letter_file) == WORDLIST_FILES:
+            return word in get_lexicon()
+        return word in load_wordlist(wordlist_file, two_letter_file)
     except FileNotFoundError as e:
         print(f"Error: {e.filename} file not found. Please download it first.")
         return False
@@ -35,104 +66,17 @@ def is_valid_word(word, wordlist_file="wordlist.txt", two_letter_file="two_lette
         print(f"Error reading wordlist files: {e}")
         return False
 
-def replenish_rack(rack):
+def replenish_rack(rack, tile_bag):
     """Replenishes the player's or computer's rack to maintain seven tiles."""
-    while len(rack) < 7 and TILE_BAG:
-        rack += draw_tiles(TILE_BAG, 1)
+    while len(rack) < 7 and tile_bag:
+        rack += draw_tiles(tile_bag, 1)
     return rack
 
-def is_adjacent_to_existing(board, start_row, start_col, direction, word_length):
-    """Checks if the word placement is adjacent to existing tiles on the board."""
-    row, col = start_row, start_col
-    for _ in range(word_length):
-        # Check adjacent cells for existing letters
-        if (
-            (row > 0 and board[row - 1][col] != '-') or
-            (row < 14 and board[row + 1][col] != '-') or
-            (col > 0 and board[row][col - 1] != '-') or
-            (col < 14 and board[row][col + 1] != '-')
-        ):
-            return True
-
-        if direction == 'H':
-            col += 1
-        elif direction == 'V':
-            row += 1
-
-    return False
-
-def is_first_move(board):
-    """Checks if the game is still on the first move (board center empty)."""
-    return board[7][7] == '-'
-
-def validate_adjacent_words(board, word, start_row, start_col, direction, wordlist):
-    """Validates that all new adjacent words formed are valid."""
-    row, col = start_row, start_col
-    for i, letter in enumerate(word):
-        if board[row][col] == '-': 
-            adjacent_word = ""
-            if direction == "H":
-                # Check vertical word
-                r = row
-                while r > 0 and board[r - 1][col] != "-":
-                    r -= 1
-                while r < 15 and board[r][col] != "-":
-                    adjacent_word += board[r][col]
-                    r += 1
-            elif direction == "V":
-                # Check horizontal word
-                c = col
-                while c > 0 and board[row][c - 1] != "-":
-                    c -= 1
-                while c < 15 and board[row][c] != "-":
-                    adjacent_word += board[row][c]
-                    c += 1
-
-            if len(adjacent_word) > 1 and not is_valid_word(adjacent_word, wordlist):
-                return False
-
-        # Move to the next letter position
-        if direction == "H":
-            col += 1
-        elif direction == "V":
-            row += 1
-
-    return True
-
 def find_possible_moves(player, board, wordlist):
     """Finds all valid moves for the computer, ensuring words attach to the board."""
-    moves = []
-
-    # Find all anchor points (existing tiles on the board)
-    for row in range(15):
-        for col in range(15):
-            if board[row][col] != '-':  # Tile exists here
-                for direction in ['H', 'V']:
-                    # Generate words using anchor tiles
-                    for word in generate_candidate_words(player.rack, board[row][col], wordlist):
-                        start_row, start_col = row, col
-                        if direction == 'H':
-                            start_col -= word.index(board[row][col]) 
-                        elif direction == 'V':
-                            start_row -= word.index(board[row][col])
-
-                        # Validate the move
-                        if is_valid_move(board, word, start_row, start_col, direction):
-                            moves.append((word, start_row, start_col, direction))
-
-    return moves
-
-def generate_candidate_words(rack, anchor_letter, wordlist):
-    """Generates all possible words using the rack and an anchor letter."""
-    possible_words = []
-    for word in wordlist:
-        if anchor_letter in word and all(
-            word.count(l) <= rack.count(l) + (1 if l == anchor_letter else 0) for l in word
-        ):
-            possible_words.append(word)
-    return possible_words
-
-def human_turn(player, board, wordlist, first_move, calculate_score):
+    return generate_moves(board, player.rack, wordlist)
+
+def human_turn(player, board, wordlist, first_move, calculate_score, tile_bag):
     """Handles the human player's turn."""
     print(f"\n{player.name}'s turn. Your rack: {' '.join(player.rack)}")
     while True:
@@ -145,83 +89,93 @@ def human_turn(player, board, wordlist, first_move, calculate_score):
             print("You chose to quit the game.")
             return True  
 
-        if not is_valid_word(word, "wordlist.txt", "two_letters.txt"):
-            print(f"'{word}' is not a valid word. Try again.")
-            continue
-
         try:
-            start_row = int(input("Enter start row (0-14): "))
-            start_col = int(input("Enter start column (0-14): "))
+            last = len(board) - 1
+            start_row = int(input(f"Enter start row (0-{last}): "))
+            start_col = int(input(f"Enter start column (0-{last}): "))
             direction = input("Enter direction (H for horizontal, V for vertical): ").upper()
 
-            if first_move and not (start_row == 7 and start_col == 7):
-                print("The first word must start at the center tile (7,7). Try again.")
-                continue
-
-            if is_valid_move(board, word, start_row, start_col, direction):
-                place_word(board, word, start_row, start_col, direction)
+            # Letters missing from the rack are played with a blank if there is one.
+            result = validate_move(board, word, start_row, start_col, direction, player.rack, wordlist)
+            if result:
+                place_word(board, result.word, start_row, start_col, direction)
                 print("Updated Board:")
                 print_board(board)
 
                 # Update player's rack and score
-                player.score += calculate_score(word)
-                print(f"Placed '{word}' and scored {calculate_score(word)} points.")
+                player.score += result.score
+                print(f"Placed '{result.word}' and scored {result.score} points.")
                 print(f"Current {player.name} score: {player.score}")
 
-                for letter in word:
-                    if letter in player.rack:
-                        player.rack.remove(letter)
-                replenish_rack(player.rack)
+                for tile in result.used:
+                    player.rack.remove(tile)
+                replenish_rack(player.rack, tile_bag)
 
                 return False  
             else:
-                print("Invalid move. Try again.")
+                print(f"Invalid move: {result.message}. Try again.")
         except ValueError:
             print("Invalid input. Try again.")
 
-def computer_turn(player, board, wordlist, first_move, calculate_score):
-    """Handles the computer player's turn."""
-    print(f"\n{player.name}'s turn (Computer). Thinking...")
-    print(f"Computer's rack: {' '.join(player.rack)}")
-
-    moves = find_possible_moves(player, board, wordlist)
-
-    # Filter moves to only include those that form valid adjacent words
-    valid_moves = []
-    for word, start_row, start_col, direction in moves:
-        if validate_adjacent_words(board, word, start_row, start_col, direction, wordlist):
-            valid_moves.append((word, start_row, start_col, direction))
-
-    if not valid_moves:
-        print("Computer cannot form a valid word and passes its turn.")
+def computer_turn(player, board, wordlist, first_move, calculate_score, tile_bag, time_budget=0.0, workers=0,
+                  ponderer=None, players=None):
+    """
+    Handles the computer player's turn. The move is chosen by a search
+    that may think for up to time_budget seconds on workers processes,
+    unless ponderer already worked it out during the previous turn.
+    Once the bag is empty in a two-player game (players), both racks are
+    known and the endgame solver takes over.
+    """
+    global endgame_solver
+    say(f"\n{player.name}'s turn (Computer). Thinking...")
+    say(f"Computer's rack: {' '.join(player.rack)}")
+    from ponder import MISSING
+    from search import best_move
+
+    found = ponderer.lookup(board, player.rack) if ponderer else MISSING
+    if found is MISSING and not tile_bag and time_budget > 0 and players and len(players) == 2:
+        from endgame import PASS, EndgameSolver
+        from gamestate import GameState
+        if endgame_solver is None:
+            endgame_solver = EndgameSolver()
+        state = GameState(board, players, tile_bag, players.index(player), first_move)
+        spread, line = endgame_solver.solve(state, time_budget)
+        say(f"Endgame search: {endgame_solver.stats}, expected spread {spread:+d}")
+        if line and line[0] is PASS:
+            say("Computer passes to play out the endgame.")
+            return first_move
+        if line:
+            found = line[0], score_move(board, *line[0])
+    if found is MISSING:
+        found = best_move(board, player.rack, wordlist, time_budget=time_budget, workers=workers)
+    if found is None:
+        say("Computer cannot form a valid word and passes its turn.")
         return first_move
 
-    # Pick a random valid move
-    word, start_row, start_col, direction = random.choice(valid_moves)
+    (word, start_row, start_col, direction), _ = found
+    result = validate_move(board, word, start_row, start_col, direction, player.rack, wordlist)
+    if not result:
+        say(f"Computer's move '{word}' was rejected ({result.reason}), so it passes its turn.")
+        return first_move
     place_word(board, word, start_row, start_col, direction)
-    print(f"Computer placed '{word}' at ({start_row}, {start_col}) going {direction}.")
+    say(f"Computer placed '{word}' at ({start_row}, {start_col}) going {direction}.")
     print_board(board)
    
     # Update computer's rack and score
-    player.score += calculate_score(word)
-    print(f"Placed '{word}' and scored {calculate_score(word)} points.")
-    print(f"Current {player.name} score: {player.score}")
-    for letter in word:
-        if letter in player.rack:
-            player.rack.remove(letter)
-    replenish_rack(player.rack)
+    player.score += result.score
+    say(f"Placed '{word}' and scored {result.score} points.")
+    say(f"Current {player.name} score: {player.score}")
+    for tile in result.used:
+        player.rack.remove(tile)
+    replenish_rack(player.rack, tile_bag)
 
     return False  
 
-def main():
-    # Step 1: Download wordlist
-    wordlist_url = "https://github.com/jonbcard/scrabble-bot/raw/master/src/dictionary.txt"
-    download_wordlist(wordlist_url)
-    wordlist = load_wordlist()
-
-    # Step 2: Initialize board and players
-    board = create_board()
-    append_special_tiles(board)
+def play(refresh_wordlist=False, time_budget=0.2, workers=0, ponder=True, record=None, layout=STANDARD):
+    # Step 1: Load the local wordlist in the background (download only on request)
+    if refresh_wordlist:
+        download_wordlist(WORDLIST_URL)
+    wordlist_loader = load_lexicon_in_background(load_checked_wordlist)
 
     print("\nWelcome to Scrabble!")
     print("Choose game mode:")
@@ -234,6 +188,21 @@ def main():
             break
         print("Invalid choice. Try again.")
 
+    # Imported once the player has been prompted, to keep start-up quick.
+    from ponder import Ponderer
+    from record import GameWriter, placed_move
+    from search import default_workers
+    if workers is None:
+        workers = default_workers()
+    wordlist, failed = wordlist_loader.result()
+    if failed:
+        print(f"Warning: {', '.join(failed)} failed the integrity check. "
+              "Run with --refresh-wordlist to download a fresh copy.")
+
+    # Step 2: Initialize board and players
+    board = create_board(wordlist, layout)
+    append_special_tiles(board, layout)
+
     players = []
     if choice == "1":
         players = [Player("Human"), Player("Computer")]
@@ -242,34 +211,195 @@ def main():
     else:
         players = [Player("Player 1"), Player("Player 2"), Player("Computer")]
 
+    tile_bag = TileBag(layout.distribution)
     for player in players:
-        player.rack = draw_tiles(TILE_BAG, 7)
+        player.rack = draw_tiles(tile_bag, 7)
 
         # Step 3: Randomize starting player
     current_player_idx = random.randint(0, len(players) - 1)
     first_move = True
-
-    print("\nGame begins! The first word must cover the center tile (7,7).")
-    while TILE_BAG or any(player.rack for player in players):
+    passes = 0
+    ponderer = Ponderer(wordlist, time_budget, workers) if ponder else None
+    record_file = open(record, "ab") if record else None
+    writer = None
+    if record_file:
+        writer = GameWriter(record_file, header=record_file.tell() == 0)
+        writer.start_game(board, players)
+
+    center = layout.size // 2
+    print(f"\nGame begins! The first word must cover the center tile ({center},{center}).")
+    # The game ends when a player goes out with the bag empty, or everyone passes in a row.
+    while passes < len(players) and (tile_bag or all(player.rack for player in players)):
         current_player = players[current_player_idx]
         print_board(board)
+        cells_before = bytes(board.cells)
+        rack_before = list(current_player.rack)
+        score_before, bag_before = current_player.score, len(tile_bag)
+        instrument.begin_turn(current_player.name)
 
         # Check if the current player chose to quit
         if current_player.name == "Computer":
-            first_move = computer_turn(current_player, board, wordlist, first_move, calculate_score)
+            first_move = computer_turn(current_player, board, wordlist, first_move, score_move, tile_bag,
+                                       time_budget, workers, ponderer, players)
         else:
-            first_move = human_turn(current_player, board, wordlist, first_move, calculate_score)
+            # Let the computer think about its reply while the human types.
+            next_player = players[(current_player_idx + 1) % len(players)]
+            if ponderer and tile_bag and next_player.name == "Computer":
+                ponderer.start(board, next_player.rack, current_player.rack)
+            first_move = human_turn(current_player, board, wordlist, first_move, score_move, tile_bag)
+            if ponderer:
+                ponderer.stop()
             if first_move:  
                 break
 
+        instrument.end_turn()
+        move = placed_move(cells_before, board)
+        passes = 0 if move else passes + 1
+        if writer:
+            drawn = current_player.rack[len(current_player.rack) - (bag_before - len(tile_bag)):]
+            writer.turn(current_player_idx, rack_before, move, current_player.score - score_before, drawn, board)
         current_player_idx = (current_player_idx + 1) % len(players)
 
     # Game Over - Display results
+    if writer:
+        writer.end_game([player.score for player in players])
+        record_file.close()
+        print(f"Game recorded to '{record}'.")
     print("\nGame Over! Final Scores:")
     for player in players:
         print(f"{player.name}: {player.score} points")
     winner = max(players, key=lambda p: p.score)
     print(f"The winner is {winner.name} with {winner.score} points!")
 
+def replay_game(path, game_index=0, turn=None):
+    """Prints the board and scores of a recorded game after turn turns (by default, at the end)."""
+    from record import read_game
+    game = read_game(path, game_index)
+    if game is None:
+        print(f"'{path}' has no game {game_index}.")
+        return
+    turn = len(game) if turn is None else min(turn, len(game))
+    print(f"Game {game_index}: {' vs '.join(game.players)}, after turn {turn} of {len(game)}")
+    print_board(game.replay(turn))
+    for name, score in zip(game.players, game.scores_at(turn)):
+        print(f"{name}: {score} points")
+
+def find_words(pattern, rack=None, min_length=2, max_length=None, limit=None):
+    """Prints the words matching pattern as they are found (see finder.py)."""
+    from finder import load_word_finder
+    finder = load_word_finder(load_wordlist())
+    try:
+        for count, word in enumerate(finder.find(pattern, rack, min_length, max_length), 1):
+            print(word)
+            if count == limit:
+                break
+    except ValueError as e:
+        print(e)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play Scrabble on the command line.")
+    parser.add_argument("--refresh-wordlist", action="store_true",
+                        help="download the wordlist again before playing")
+    parser.add_argument("--think", type=float, default=0.2,
+                        help="seconds the computer may think per turn (default: 0.2)")
+    parser.add_argument("--no-ponder", action="store_true",
+                        help="don't let the computer think while a human is typing")
+    parser.add_argument("--search-workers", type=int, default=None,
+                        help="processes for the computer's search (default: all cores but one)")
+    parser.add_argument("--record", help="append a binary record of the game to this file")
+    parser.add_argument("--layout", choices=sorted(LAYOUTS), default=STANDARD.name,
+                        help="board and bag to play with: the standard 15x15 one or the 21x21 'super' one")
+    parser.add_argument("--leaves", metavar="FILE",
+                        help="rack-leave table for the computer to use (default: leaves.table if present)")
+    parser.add_argument("--stats", metavar="FILE",
+                        help="write per-turn timings and hot-path counters as JSON ('-' for stderr)")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="write a cProfile dump (for pstats, snakeviz or flameprof) of the run")
+    commands = parser.add_subparsers(dest="command")
+    selfplay = commands.add_parser("selfplay", help="play computer-vs-computer games without prompts")
+    selfplay.add_argument("--games", type=int, default=100, help="number of games to play")
+    selfplay.add_argument("--seed", type=int, default=0, help="seed of the first game")
+    selfplay.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    selfplay.add_argument("--out", default="-", help="JSONL results file ('-' for stdout)")
+    selfplay.add_argument("--think", type=float, default=0.0, dest="selfplay_think",
+                          help="seconds each computer may think per turn (default: 0)")
+    selfplay.add_argument("--record", dest="selfplay_record", help="write binary records of the games to this file")
+    batch = commands.add_parser("batch", help="find the best moves for JSONL positions")
+    batch.add_argument("input", nargs="?", default="-", help="JSONL positions file ('-' for stdin)")
+    batch.add_argument("--out", default="-", dest="batch_out", help="JSONL results file ('-' for stdout)")
+    batch.add_argument("--top", type=int, default=10, help="moves to report per position")
+    batch.add_argument("--workers", type=int, default=None, dest="batch_workers",
+                       help="worker processes (default: CPU count)")
+    serve = commands.add_parser("serve", help="host many games over a line-based JSON protocol")
+    serve.add_argument("--port", type=int, default=8765, help="port to listen on (localhost only)")
+    serve.add_argument("--workers", type=int, default=None, dest="serve_workers",
+                       help="processes for the computer's searches (default: one per spare core; "
+                            "0 searches on a thread of the server)")
+    loadtest = commands.add_parser("loadtest", help="measure a running server's throughput and latency")
+    loadtest.add_argument("--port", type=int, default=8765, help="server port")
+    loadtest.add_argument("--sessions", type=int, default=100, help="concurrent games")
+    loadtest.add_argument("--moves", type=int, default=10, help="moves per game")
+    replay = commands.add_parser("replay", help="show a recorded game at any turn")
+    replay.add_argument("file", help="game record file")
+    replay.add_argument("--game", type=int, default=0, help="which game in the file (default: the first)")
+    replay.add_argument("--turn", type=int, default=None, help="show the board after this many turns")
+    leavegen = commands.add_parser("leaves", help="learn rack-leave values from self-play")
+    leavegen.add_argument("--games", type=int, default=10000, help="number of games to play")
+    leavegen.add_argument("--seed", type=int, default=0, dest="leaves_seed", help="seed of the first game")
+    leavegen.add_argument("--workers", type=int, default=None, dest="leaves_workers",
+                          help="worker processes (default: CPU count)")
+    leavegen.add_argument("--out", default="leaves.table", dest="leaves_out", help="leave table to write")
+    find = commands.add_parser("find", help="list the words that fit a pattern, e.g. Q?I*")
+    find.add_argument("pattern", help="letters, '?' for any one letter and '*' for any run of letters")
+    find.add_argument("--rack", help="tiles the wildcards must be filled from ('@' for a blank)")
+    find.add_argument("--min-length", type=int, default=2, help="shortest word to list")
+    find.add_argument("--max-length", type=int, default=None, help="longest word to list")
+    find.add_argument("--limit", type=int, default=None, help="stop after this many words")
+    args = parser.parse_args(argv)
+
+    if args.leaves:
+        if not os.path.exists(args.leaves):
+            parser.error(f"no leave table at '{args.leaves}'")
+        load_leave_table(args.leaves)
+    if args.stats:
+        instrument.enable()
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler:
+        profiler.enable()
+    try:
+        run_command(args, args.search_workers)
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+        if args.stats:
+            instrument.write_summary(args.stats)
+
+def run_command(args, search_workers):
+    """Runs the subcommand chosen on the command line, or an interactive game."""
+    if args.command == "selfplay":
+        from simulate import run_selfplay
+        run_selfplay(args.games, args.seed, args.workers, args.out, args.selfplay_think, args.selfplay_record,
+                     args.layout)
+    elif args.command == "batch":
+        from batch import run_batch
+        run_batch(args.input, args.batch_out, args.top, args.batch_workers)
+    elif args.command == "serve":
+        from server import run_server
+        run_server(port=args.port, workers=args.serve_workers, time_budget=args.think, layout=args.layout)
+    elif args.command == "loadtest":
+        from server import run_load_test
+        run_load_test(port=args.port, sessions=args.sessions, moves=args.moves)
+    elif args.command == "replay":
+        replay_game(args.file, args.game, args.turn)
+    elif args.command == "leaves":
+        from leavegen import run_leavegen
+        run_leavegen(args.games, args.leaves_seed, args.leaves_workers, args.leaves_out)
+    elif args.command == "find":
+        find_words(args.pattern, args.rack, args.min_length, args.max_length, args.limit)
+    else:
+        play(args.refresh_wordlist, args.think, search_workers, not args.no_ponder, args.record,
+             LAYOUTS[args.layout])
+
 if __name__ == "__main__":
     main()
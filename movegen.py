@@ -0,0 +1,153 @@
+"""
+Move generation in the style of Appel & Jacobson: every legal placement
+is built outward from an anchor square by walking the lexicon DAWG with
+the rack, so words that can't fit the board are never considered.
+"""
+import instrument
+from board import LETTER_BITS
+from pool import get_pool
+
+BLANK = "@"
+PARALLEL_SIZE = 21  # smaller boards generate faster than a round trip to the pool
+
+
+def _line_word(line, pos, step):
+    """Collects the run of tiles next to pos, walking away from it by step."""
+    letters = []
+    pos += step
+    while 0 <= pos < len(line) and line[pos] is not None:
+        letters.append(line[pos])
+        pos += step
+    if step < 0:
+        letters.reverse()
+    return "".join(letters)
+
+
+def generate_line_moves(line, checks, anchors, rack, lexicon, emit):
+    """
+    Generates every word that can be played along one line.
+    rack maps tiles to counts and is restored before returning; emit is
+    called with (word, start) for each legal placement. Blanks are played
+    as lowercase letters.
+    """
+    size = len(line)
+    children = lexicon.children
+    anchor = 0
+
+    def extend_right(partial, node, pos, terminal):
+        if pos == size or line[pos] is None:
+            if terminal and pos > anchor:
+                emit(partial, pos - len(partial))
+            if pos == size:
+                return
+            mask = checks[pos]
+            if not mask:
+                return
+            for letter, (child, child_terminal) in children(node).items():
+                if not mask & LETTER_BITS[letter]:
+                    continue
+                if rack.get(letter):
+                    rack[letter] -= 1
+                    extend_right(partial + letter, child, pos + 1, child_terminal)
+                    rack[letter] += 1
+                if rack.get(BLANK):
+                    rack[BLANK] -= 1
+                    extend_right(partial + letter.lower(), child, pos + 1, child_terminal)
+                    rack[BLANK] += 1
+        else:
+            tile = line[pos]
+            edge = children(node).get(tile.upper())
+            if edge is not None:
+                extend_right(partial + tile, edge[0], pos + 1, edge[1])
+
+    def left_part(partial, node, limit):
+        extend_right(partial, node, anchor, False)
+        if limit == 0:
+            return
+        for letter, (child, _) in children(node).items():
+            if rack.get(letter):
+                rack[letter] -= 1
+                left_part(partial + letter, child, limit - 1)
+                rack[letter] += 1
+            if rack.get(BLANK):
+                rack[BLANK] -= 1
+                left_part(partial + letter.lower(), child, limit - 1)
+                rack[BLANK] += 1
+
+    tiles = sum(rack.values())
+    for anchor in range(size):
+        if not anchors[anchor]:
+            continue
+        if anchor > 0 and line[anchor - 1] is not None:
+            prefix = _line_word(line, anchor, -1)
+            found = lexicon.walk(prefix.upper())
+            if found is not None:
+                extend_right(prefix, found[0], anchor, False)
+        else:
+            limit = 0
+            while (limit < tiles - 1 and anchor - limit > 0
+                   and line[anchor - limit - 1] is None and not anchors[anchor - limit - 1]):
+                limit += 1
+            left_part("", lexicon.root, limit)
+
+
+def generate_lines(lines, counts, lexicon):
+    """
+    Generates the moves along lines, given as (direction, index, line,
+    checks, anchors) tuples, for a rack of counts.
+    """
+    moves = []
+    for direction, i, line, checks, anchors in lines:
+        if direction == "H":
+            emit = lambda word, start, i=i: moves.append((word, i, start, "H"))
+        else:
+            emit = lambda word, start, i=i: moves.append((word, start, i, "V"))
+        generate_line_moves(line, checks, anchors, counts, lexicon, emit)
+    return moves
+
+
+def generate_moves(board, rack, lexicon, workers=0):
+    """
+    Returns every legal placement of tiles from rack as a list of
+    (word, start_row, start_col, direction) tuples. word spells the whole
+    line word, including tiles already on the board. On boards of at least
+    PARALLEL_SIZE squares a side, workers > 1 spreads the rows and columns
+    over that many processes; the moves come back in the same order.
+    """
+    counts = {}
+    for tile in rack:
+        tile = tile.upper()
+        counts[tile] = counts.get(tile, 0) + 1
+
+    lines = []
+    for direction in ("H", "V"):
+        for i in range(board.size):
+            anchors = board.line_anchors(direction, i)
+            if any(anchors):
+                lines.append((direction, i, board.line(direction, i), board.line_checks(direction, i), anchors))
+    if instrument.enabled:
+        instrument.count("movegen.lines", len(lines))
+
+    if workers > 1 and board.size >= PARALLEL_SIZE and len(lines) > 1:
+        # Contiguous slices keep the moves in the order a serial run finds them.
+        parts = min(workers, len(lines))
+        bounds = [len(lines) * k // parts for k in range(parts + 1)]
+        futures = [get_pool(workers).submit(generate_lines, lines[start:end], counts, lexicon)
+                   for start, end in zip(bounds, bounds[1:])]
+        moves = [move for future in futures for move in future.result()]
+    else:
+        moves = generate_lines(lines, counts, lexicon)
+    if instrument.enabled:
+        instrument.count("movegen.calls")
+        instrument.count("movegen.moves", len(moves))
+    return moves
+
+
+def tiles_used(board, word, start_row, start_col, direction):
+    """Returns the rack tiles a placement uses, with blanks as '@'."""
+    used = []
+    for i, letter in enumerate(word):
+        row, col = (start_row, start_col + i) if direction == "H" else (start_row + i, start_col)
+        if board.letter_at(row, col) is None:
+            used.append(BLANK if letter.islower() else letter)
+    return used
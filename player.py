@@ -8,16 +8,17 @@ class Player:
 
     def play_word(self, board, word, start_row, start_col, direction):
         """
-        Plays a word on the board. Updates score and rack.
+        Plays a word on the board if it is legal for this player's rack.
+        Updates score and rack.
         """
-        from board import place_word, is_valid_move
-        from tiles import calculate_score
+        from board import place_word
+        from validate import validate_move
 
-        if is_valid_move(board, word, start_row, start_col, direction):
-            place_word(board, word, start_row, start_col, direction)
-            self.score += calculate_score(word)
-            for letter in word.upper():
-                if letter in self.rack:
-                    self.rack.remove(letter)
+        result = validate_move(board, word, start_row, start_col, direction, self.rack)
+        if result:
+            place_word(board, result.word, start_row, start_col, direction)
+            self.score += result.score
+            for tile in result.used:
+                self.rack.remove(tile)
             return True
         return False
@@ -0,0 +1,107 @@
+"""
+Thinking on the opponent's time: while a human is typing a move, the
+computer searches the positions it is likely to face next, so that its
+reply is usually ready the moment the human's move lands.
+"""
+import threading
+
+from search import best_move, rank_moves
+from movegen import generate_moves
+
+PREDICTIONS = 6
+MISSING = object()
+
+
+def position_key(board, rack):
+    """Identifies a position by its tiles and the rack to move."""
+    return bytes(board.cells), tuple(sorted(rack))
+
+
+class _Search:
+    """
+    One background run of the ponderer: its thread, the results it has
+    cached, the position it is on and the events that end it.
+    """
+
+    __slots__ = ("thread", "cache", "current", "finish", "abandon")
+
+    def __init__(self):
+        self.thread = None
+        self.cache = {}
+        self.current = None
+        self.finish = threading.Event()   # don't start another position
+        self.abandon = threading.Event()  # cut the current position's search short
+
+
+class Ponderer:
+    """
+    Searches on a background thread: first the current position (in case
+    the human passes), then the positions after the human's most likely
+    moves, caching the computer's best move for each.
+    """
+
+    def __init__(self, lexicon, time_budget, workers=0, predictions=PREDICTIONS):
+        self.lexicon = lexicon
+        self.time_budget = time_budget
+        self.workers = workers
+        self.predictions = predictions
+        self._search = None
+
+    def start(self, board, computer_rack, human_rack):
+        """Starts thinking about the computer's reply to a human about to move."""
+        self._cancel()
+        search = self._search = _Search()
+        search.thread = threading.Thread(
+            target=self._run,
+            args=(search, board.copy(), list(computer_rack), list(human_rack)),
+            name="ponder",
+            daemon=True,
+        )
+        search.thread.start()
+
+    def stop(self):
+        """Asks the background search to stop after its current position."""
+        if self._search is not None:
+            self._search.finish.set()
+
+    def lookup(self, board, rack):
+        """
+        Returns the precomputed best_move() result for this position, or
+        MISSING. If the position is the one being searched right now, this
+        waits for that search to finish instead of starting over; any other
+        search is cut short, so it doesn't compete with the computer's own.
+        """
+        search = self._search
+        if search is None:
+            return MISSING
+        key = position_key(board, rack)
+        search.finish.set()
+        if key not in search.cache and search.current != key:
+            search.abandon.set()
+        search.thread.join()
+        return search.cache.get(key, MISSING)
+
+    def _cancel(self):
+        """Cuts the running search short and waits for its thread to end."""
+        search = self._search
+        if search is not None:
+            search.finish.set()
+            search.abandon.set()
+            search.thread.join()
+
+    def _run(self, search, board, computer_rack, human_rack):
+        positions = [board]
+        human_moves = generate_moves(board, human_rack, self.lexicon)
+        for _, _, move, _ in rank_moves(board, human_rack, human_moves)[:self.predictions]:
+            after = board.copy()
+            after.place(*move)
+            positions.append(after)
+        for position in positions:
+            if search.finish.is_set():
+                break
+            key = search.current = position_key(position, computer_rack)
+            found = best_move(position, computer_rack, self.lexicon, time_budget=self.time_budget,
+                              workers=self.workers, stop=search.abandon)
+            if not search.abandon.is_set():
+                search.cache[key] = found
+        search.current = None
@@ -0,0 +1,49 @@
+"""
+Worker processes: the pool shared by the search and the move generator,
+created on first use and kept for the rest of the run, and the
+multiprocessing pools of the batch jobs (self-play, batch analysis,
+leave learning), whose workers each open the shared lexicon once.
+
+multiprocessing and concurrent.futures are imported when a pool is first
+made: they are slow to import, and an interactive game usually never
+needs them.
+"""
+from lexicon import get_lexicon
+
+_pool = None
+_pool_workers = 0
+_lexicon = None
+
+
+def get_pool(workers):
+    """Returns the shared pool, (re)starting it with workers processes if needed."""
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers != workers:
+        from concurrent.futures import ProcessPoolExecutor
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+        _pool = ProcessPoolExecutor(max_workers=workers)
+        _pool_workers = workers
+    return _pool
+
+
+def _init_worker():
+    global _lexicon
+    _lexicon = get_lexicon()
+
+
+def lexicon_pool(workers=None):
+    """
+    Returns a multiprocessing.Pool of workers (default: CPU count) that
+    each open the shared lexicon at start-up. The lexicon is compiled
+    here first, so every worker maps the same file instead of compiling
+    its own.
+    """
+    import multiprocessing
+    get_lexicon()
+    return multiprocessing.Pool(workers, initializer=_init_worker)
+
+
+def worker_lexicon():
+    """Returns the lexicon of this lexicon_pool() worker, or the shared one outside a worker."""
+    return _lexicon or get_lexicon()
@@ -0,0 +1,256 @@
+"""
+Compact binary game records.
+
+A record file is MAGIC followed by a stream of length-prefixed records,
+so a reader can skip what it doesn't need and a file can hold any number
+of games appended one after another:
+
+    GAME      board size, premium layout (if not standard), player names
+    TURN      player, rack before the move, the move (or a pass),
+              score and the tiles drawn afterwards
+    SNAPSHOT  every SNAPSHOT_EVERY turns: the tiles on the board and the
+              scores, so replay() can start close to any turn
+    END       final scores
+
+Strings are ASCII tiles ('@' for a blank on a rack, lowercase for a
+played blank) and integers are little-endian.
+"""
+import mmap
+import os
+import struct
+from collections import namedtuple
+
+from board import STANDARD_PREMIUMS, Board
+
+MAGIC = b"SCRBGAME"
+VERSION = 1
+FILE_HEADER = struct.Struct("<8sH")
+RECORD_HEADER = struct.Struct("<BH")
+GAME, TURN, SNAPSHOT, END = range(4)
+SNAPSHOT_EVERY = 16
+
+PLACEMENT = struct.Struct("<BBc")
+SCORE = struct.Struct("<h")
+SNAPSHOT_FIXED = struct.Struct("<I")
+
+Turn = namedtuple("Turn", "player rack move score drawn")
+
+
+class Game:
+    """A recorded game: its layout, players, turns, snapshots and final scores."""
+
+    def __init__(self, size, premiums, players):
+        self.size = size
+        self.premiums = premiums
+        self.players = players
+        self.turns = []
+        self.snapshots = []  # [(turn, cells, scores)], in turn order
+        self.scores = None
+
+    def __len__(self):
+        return len(self.turns)
+
+    def replay(self, turn=None, lexicon=None):
+        """
+        Returns the Board after the first turn turns (all of them by
+        default), starting from the nearest snapshot before it.
+        """
+        turn = len(self.turns) if turn is None else turn
+        start, cells = 0, bytes(self.size * self.size)
+        for snap_turn, snap_cells, _ in self.snapshots:
+            if snap_turn > turn:
+                break
+            start, cells = snap_turn, snap_cells
+        board = Board.from_cells(cells, lexicon, self.premiums)
+        for recorded in self.turns[start:turn]:
+            if recorded.move is not None:
+                board.place(*recorded.move)
+        return board
+
+    def scores_at(self, turn):
+        """Returns the players' scores after the first turn turns."""
+        start, scores = 0, [0] * len(self.players)
+        for snap_turn, _, snap_scores in self.snapshots:
+            if snap_turn > turn:
+                break
+            start, scores = snap_turn, list(snap_scores)
+        for recorded in self.turns[start:turn]:
+            scores[recorded.player] += recorded.score
+        return scores
+
+
+def _pack_tiles(tiles):
+    data = "".join(tiles).encode("ascii")
+    return bytes((len(data),)) + data
+
+
+def _unpack_tiles(data, offset):
+    length = data[offset]
+    return data[offset + 1:offset + 1 + length].decode("ascii"), offset + 1 + length
+
+
+class GameWriter:
+    """
+    Streams games to a binary file object. Records are written as they
+    happen, so an interrupted run still leaves every finished turn behind.
+    header=False writes records only, for appending to an existing stream.
+    """
+
+    def __init__(self, stream, snapshot_every=SNAPSHOT_EVERY, header=True):
+        self.stream = stream
+        self.snapshot_every = snapshot_every
+        self._turns = 0
+        self._scores = []
+        if header:
+            stream.write(FILE_HEADER.pack(MAGIC, VERSION))
+
+    def _write(self, kind, body):
+        self.stream.write(RECORD_HEADER.pack(kind, len(body)) + body)
+
+    def start_game(self, board, players):
+        """Starts a game on board between players (anything with a name)."""
+        self._turns = 0
+        self._scores = [0] * len(players)
+        standard = board.premiums == STANDARD_PREMIUMS
+        body = bytes((board.size, len(players), standard))
+        if not standard:
+            body += bytes(board.premiums)
+        for player in players:
+            name = player.name.encode()
+            body += bytes((len(name),)) + name
+        self._write(GAME, body)
+
+    def turn(self, player, rack, move, score, drawn, board):
+        """
+        Records a turn by player (an index): the rack it started with,
+        move as (word, row, col, direction) or None for a pass, its score
+        and the tiles drawn. board is the board after the move.
+        """
+        body = bytes((player,)) + _pack_tiles(rack)
+        if move is None:
+            body += bytes((0,))
+        else:
+            word, row, col, direction = move
+            body += _pack_tiles(word) + PLACEMENT.pack(row, col, direction.encode())
+        body += SCORE.pack(score) + _pack_tiles(drawn)
+        self._write(TURN, body)
+        self._scores[player] += score
+        self._turns += 1
+        if self._turns % self.snapshot_every == 0:
+            body = SNAPSHOT_FIXED.pack(self._turns) + bytes(board.cells)
+            body += struct.pack(f"<{len(self._scores)}i", *self._scores)
+            self._write(SNAPSHOT, body)
+
+    def end_game(self, scores):
+        """Ends the game with the players' final scores."""
+        self._write(END, struct.pack(f"<{len(scores)}i", *scores))
+
+
+def parse_games(data, skip=0):
+    """
+    Yields every Game in the bytes (or mmap) of a record file, from game
+    number skip on. The records of skipped games are passed over by their
+    length prefix without being decoded.
+    """
+    magic, version = FILE_HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a game record")
+    offset = FILE_HEADER.size
+    game = None
+    index = -1
+    while offset < len(data):
+        kind, length = RECORD_HEADER.unpack_from(data, offset)
+        offset += RECORD_HEADER.size
+        end = offset + length
+        if kind == GAME:
+            index += 1
+            if game is not None:
+                yield game
+                game = None
+        if index < skip:
+            offset = end
+            continue
+        if kind == GAME:
+            size, count, standard = data[offset:offset + 3]
+            pos = offset + 3
+            premiums = STANDARD_PREMIUMS
+            if not standard:
+                premiums = bytes(data[pos:pos + size * size])
+                pos += size * size
+            players = []
+            for _ in range(count):
+                name_length = data[pos]
+                players.append(data[pos + 1:pos + 1 + name_length].decode())
+                pos += 1 + name_length
+            game = Game(size, premiums, players)
+        elif kind == TURN:
+            player = data[offset]
+            rack, pos = _unpack_tiles(data, offset + 1)
+            word, pos = _unpack_tiles(data, pos)
+            move = None
+            if word:
+                row, col, direction = PLACEMENT.unpack_from(data, pos)
+                move = (word, row, col, direction.decode())
+                pos += PLACEMENT.size
+            score, = SCORE.unpack_from(data, pos)
+            drawn, _ = _unpack_tiles(data, pos + SCORE.size)
+            game.turns.append(Turn(player, rack, move, score, drawn))
+        elif kind == SNAPSHOT:
+            turn, = SNAPSHOT_FIXED.unpack_from(data, offset)
+            cells_end = offset + SNAPSHOT_FIXED.size + game.size * game.size
+            cells = bytes(data[offset + SNAPSHOT_FIXED.size:cells_end])
+            scores = struct.unpack_from(f"<{len(game.players)}i", data, cells_end)
+            game.snapshots.append((turn, cells, scores))
+        elif kind == END:
+            game.scores = list(struct.unpack_from(f"<{len(game.players)}i", data, offset))
+        offset = end
+    if game is not None:
+        yield game
+
+
+def read_games(path, skip=0):
+    """
+    Yields every Game recorded in the file at path, from game number skip
+    on. The file is memory-mapped, so games are decoded one at a time as
+    they are reached and skipped ones are never read in full.
+    """
+    with open(path, "rb") as f:
+        if not os.fstat(f.fileno()).st_size:
+            raise ValueError("not a game record")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield from parse_games(data, skip)
+
+
+def read_game(path, index):
+    """Returns game number index of the file at path, or None if it has fewer games."""
+    if index < 0:
+        return None
+    return next(read_games(path, index), None)
+
+
+def placed_move(cells_before, board):
+    """
+    Works out the move just played from the board before it (its cells)
+    and after it: returns (word, row, col, direction) covering the new
+    tiles, or None if nothing was placed.
+    """
+    size = board.size
+    placed = [i for i, (old, new) in enumerate(zip(cells_before, board.cells)) if old != new]
+    if not placed:
+        return None
+    row, col = divmod(placed[0], size)
+    if len(placed) > 1:
+        direction = "H" if placed[-1] // size == row else "V"
+    else:
+        # A single tile: the move's word is along whichever line it extends.
+        horizontal = any(board.letter_at(row, c) for c in (col - 1, col + 1))
+        direction = "H" if horizontal or not any(board.letter_at(r, col) for r in (row - 1, row + 1)) else "V"
+    d_row, d_col = (0, 1) if direction == "H" else (1, 0)
+    while board.letter_at(row - d_row, col - d_col):
+        row, col = row - d_row, col - d_col
+    word = []
+    r, c = row, col
+    while board.letter_at(r, c):
+        word.append(board.letter_at(r, c))
+        r, c = r + d_row, c + d_col
+    return "".join(word), row, col, direction
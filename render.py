@@ -0,0 +1,115 @@
+"""
+Board rendering. Each frame is built in one buffer and written with a
+single call. On an ANSI terminal the board is pinned to the top of the
+screen, with messages scrolling in the region below it. Later frames
+then only rewrite the cells that changed, and a frame identical to the
+one on screen costs nothing. In quiet mode nothing is rendered at all.
+"""
+import atexit
+import contextlib
+import os
+import shutil
+import sys
+
+CELL_WIDTH = 5  # "XX" plus the " | " separator
+ROW_LABEL = 5   # "NN | "
+
+_settings = {"quiet": False, "ansi": None, "stream": None}
+_pinned = {"size": None, "cells": None, "registered": False}
+
+
+def configure(quiet=None, ansi=None, stream=None):
+    """
+    Changes how boards are shown. quiet turns rendering off; ansi forces
+    the pinned, diff-based mode on or off (by default it is used when
+    stream is a capable terminal); stream defaults to sys.stdout.
+    """
+    if quiet is not None:
+        _settings["quiet"] = quiet
+    if ansi is not None:
+        _settings["ansi"] = ansi
+    if stream is not None:
+        _settings["stream"] = stream
+    _pinned["size"] = None
+
+
+@contextlib.contextmanager
+def quiet():
+    """Renders nothing inside the with block."""
+    previous = _settings["quiet"]
+    _settings["quiet"] = True
+    try:
+        yield
+    finally:
+        _settings["quiet"] = previous
+
+
+def say(*args):
+    """Prints a game message unless rendering is quiet."""
+    if not _settings["quiet"]:
+        print(*args, file=_settings["stream"] or sys.stdout)
+
+
+def _board_cells(board):
+    size = len(board)
+    return [[board[row, col] for col in range(size)] for row in range(size)]
+
+
+def format_board(board, cells=None):
+    """Returns the text of a board frame, one line per row and separator."""
+    cells = cells or _board_cells(board)
+    size = len(cells)
+    separator = "   " + "-" * (CELL_WIDTH * size + 1)
+    lines = ["    " + " " + "   ".join(f"{i:2}" for i in range(size)), separator]
+    for i, row in enumerate(cells):
+        lines.append(f"{i:2} | " + " | ".join(f"{cell:2}" for cell in row) + " |")
+        lines.append(separator)
+    return "\n".join(lines) + "\n"
+
+
+def _use_ansi(stream, frame_lines):
+    ansi = _settings["ansi"]
+    if ansi is None:
+        ansi = stream.isatty() and os.environ.get("TERM", "dumb") != "dumb"
+    return ansi and shutil.get_terminal_size().lines >= frame_lines + 5
+
+
+def show_board(board):
+    """Renders board to the configured stream, as the mode dictates."""
+    if _settings["quiet"]:
+        return
+    stream = _settings["stream"] or sys.stdout
+    cells = _board_cells(board)
+    size = len(cells)
+    frame_lines = 2 + 2 * size
+    if not _use_ansi(stream, frame_lines):
+        stream.write(format_board(board, cells))
+        stream.flush()
+        return
+
+    if _pinned["size"] != size:
+        # Draw the whole frame at the top and let everything else scroll below it.
+        rows = shutil.get_terminal_size().lines
+        stream.write(f"\033[2J\033[H{format_board(board, cells)}\033[{frame_lines + 1};{rows}r\033[{rows};1H")
+        if not _pinned["registered"]:
+            atexit.register(_release, stream)
+            _pinned["registered"] = True
+        _pinned["size"] = size
+    else:
+        previous = _pinned["cells"]
+        updates = [
+            f"\033[{3 + 2 * row};{1 + ROW_LABEL + CELL_WIDTH * col}H{cell:2}"
+            for row in range(size) for col, cell in enumerate(cells[row])
+            if cell != previous[row][col]
+        ]
+        if updates:
+            stream.write("\0337" + "".join(updates) + "\0338")
+    _pinned["cells"] = cells
+    stream.flush()
+
+
+def _release(stream):
+    """Gives the whole screen back to scrolling when the program exits."""
+    if _pinned["size"] is not None:
+        stream.write(f"\033[r\033[{shutil.get_terminal_size().lines};1H")
+        stream.flush()
@@ -0,0 +1,76 @@
+"""
+Rule-accurate move scoring: premium squares under newly placed tiles,
+cross-words and the bingo bonus. Everything a move needs besides its own
+letters is precomputed, either per board layout (the premium tables) or
+incrementally by the board itself (the cross-word scores).
+"""
+import instrument
+from board import PREMIUM_NAMES
+from tiles import LETTER_POINTS
+
+BINGO_TILES = 7
+BINGO_BONUS = 50
+
+LETTER_MULTIPLIERS = tuple({"DL": 2, "TL": 3}.get(name, 1) for name in PREMIUM_NAMES)
+WORD_MULTIPLIERS = tuple({"DW": 2, "TW": 3}.get(name, 1) for name in PREMIUM_NAMES)
+
+# Face value by character code, so blanks (lowercase) fall out as zero.
+TILE_POINTS = [0] * 128
+for _letter, _points in LETTER_POINTS.items():
+    TILE_POINTS[ord(_letter)] = _points
+
+
+def score_moves(board, moves):
+    """
+    Scores a batch of (word, start_row, start_col, direction) moves
+    against the current board, which must not yet contain them.
+    """
+    size = board.size
+    cells = board.cells
+    premiums = board.premiums
+    cross_scores = board.cross_scores
+    points = TILE_POINTS
+    letter_multipliers = LETTER_MULTIPLIERS
+    word_multipliers = WORD_MULTIPLIERS
+
+    scores = []
+    for word, start_row, start_col, direction in moves:
+        # Cross-word scores are indexed along the direction of play.
+        crosses = cross_scores[direction]
+        if direction == "H":
+            index, step = start_row * size + start_col, 1
+            cross_index = start_row * size + start_col
+        else:
+            index, step = start_row * size + start_col, size
+            cross_index = start_col * size + start_row
+        main = 0
+        multiplier = 1
+        extra = 0
+        placed = 0
+        for letter in word:
+            if cells[index]:
+                main += points[cells[index]]
+            else:
+                premium = premiums[index]
+                value = points[ord(letter)] * letter_multipliers[premium]
+                main += value
+                word_multiplier = word_multipliers[premium]
+                multiplier *= word_multiplier
+                placed += 1
+                cross = crosses[cross_index]
+                if cross >= 0:
+                    extra += (cross + value) * word_multiplier
+            index += step
+            cross_index += 1
+        score = main * multiplier + extra
+        if placed == BINGO_TILES:
+            score += BINGO_BONUS
+        scores.append(score)
+    if instrument.enabled:
+        instrument.count("scoring.moves", len(scores))
+    return scores
+
+
+def score_move(board, word, start_row, start_col, direction):
+    """Scores a single move against the current board."""
+    return score_moves(board, [(word, start_row, start_col, direction)])[0]
@@ -0,0 +1,150 @@
+"""
+Time-budgeted move search for the computer player.
+
+Moves are first ranked statically by equity (score plus the value of the
+rack leave). If there is time left, the best few candidates are refined
+by Monte Carlo simulation: the opponent is dealt random racks from the
+unseen tiles and its best reply is subtracted. Simulations run on a
+process pool when workers are requested, and whatever has been learned
+when the deadline hits decides the move.
+"""
+import os
+import random
+import time
+
+import instrument
+from layouts import layout_for_size
+from leaves import leave_value
+from movegen import generate_moves, tiles_used
+from pool import get_pool
+from scoring import score_moves
+from tiles import TILE_BAG
+
+RACK_SIZE = 7
+CANDIDATES = 8
+
+
+def unseen_tiles(board, rack, distribution=None):
+    """
+    Returns the tiles that are neither on the board nor in rack: the bag
+    plus the other racks. distribution defaults to the full bag of the
+    board's layout.
+    """
+    if distribution is None:
+        layout = layout_for_size(board.size)
+        distribution = layout.distribution if layout else TILE_BAG
+    counts = dict(distribution)
+    for tile in board.cells:
+        if tile:
+            tile = "@" if 97 <= tile <= 122 else chr(tile)
+            counts[tile] -= 1
+    for tile in rack:
+        counts[tile] -= 1
+    return [tile for tile, count in counts.items() for _ in range(max(count, 0))]
+
+
+def rank_moves(board, rack, moves):
+    """
+    Returns [(equity, score, move, leave), ...] for moves, best first.
+    leave is the list of tiles kept from rack.
+    """
+    ranked = []
+    for move, score in zip(moves, score_moves(board, moves)):
+        leave = list(rack)
+        for tile in tiles_used(board, *move):
+            leave.remove(tile)
+        ranked.append((score + leave_value(leave), score, move, leave))
+    ranked.sort(key=lambda entry: entry[0], reverse=True)
+    return ranked
+
+
+def simulate_replies(board, iterations, unseen, seed):
+    """
+    Deals iterations random opponent racks from unseen and returns the
+    total score of the opponent's best reply on board.
+    """
+    rng = random.Random(seed)
+    lexicon = board.lexicon
+    total = 0
+    for _ in range(iterations):
+        rack = rng.sample(unseen, min(RACK_SIZE, len(unseen)))
+        replies = generate_moves(board, rack, lexicon)
+        total += max(score_moves(board, replies), default=0)
+    return total
+
+
+def best_move(board, rack, lexicon, unseen=None, time_budget=0.0, workers=0, candidates=CANDIDATES, seed=None,
+              stop=None):
+    """
+    Searches for the best move for rack within time_budget seconds.
+    Returns (move, score), or None when there is no legal move.
+    workers > 1 spreads the simulations over that many processes.
+    Setting stop (a threading.Event) ends the search early, as if its
+    deadline had passed.
+    """
+    deadline = time.perf_counter() + time_budget
+    moves = generate_moves(board, rack, lexicon, workers)
+    if not moves:
+        return None
+    ranked = rank_moves(board, rack, moves)
+    unseen = unseen_tiles(board, rack) if unseen is None else unseen
+    top = ranked[:candidates]
+    if len(top) == 1 or not unseen or time.perf_counter() >= deadline or (stop is not None and stop.is_set()):
+        return top[0][2], top[0][1]
+
+    rng = random.Random(seed)
+    positions = []
+    for _, _, move, _ in top:
+        after = board.copy()
+        after.place(*move)
+        positions.append(after)
+    totals = [0] * len(top)
+    samples = [0] * len(top)
+
+    if workers > 1:
+        from concurrent.futures import FIRST_COMPLETED, wait
+        pool = get_pool(workers)
+        pending = {}
+        turn = 0
+        while True:
+            while len(pending) < 2 * workers:
+                i = turn % len(top)
+                future = pool.submit(simulate_replies, positions[i], 1, unseen, rng.random())
+                pending[future] = i
+                turn += 1
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0 or (stop is not None and stop.is_set()):
+                break
+            done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                i = pending.pop(future)
+                totals[i] += future.result()
+                samples[i] += 1
+        for future in pending:
+            future.cancel()
+    else:
+        # Stop early rather than start a simulation that would overrun.
+        i = 0
+        started = now = time.perf_counter()
+        while (now < deadline and (not any(samples) or now + (now - started) / sum(samples) <= deadline)
+               and (stop is None or not stop.is_set())):
+            totals[i] += simulate_replies(positions[i], 1, unseen, rng.random())
+            samples[i] += 1
+            i = (i + 1) % len(top)
+            now = time.perf_counter()
+
+    if instrument.enabled:
+        instrument.count("search.simulations", sum(samples))
+    # Candidates that never got a sample are charged the average reply.
+    average = sum(totals) / sum(samples) if sum(samples) else 0
+    best = max(
+        range(len(top)),
+        key=lambda i: top[i][0] - (totals[i] / samples[i] if samples[i] else average),
+    )
+    return top[best][2], top[best][1]
+
+
+def default_workers():
+    """Uses every core but one for simulations, or none on a single-core machine."""
+    cores = os.cpu_count() or 1
+    return cores - 1 if cores > 2 else 0
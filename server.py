@@ -0,0 +1,246 @@
+"""
+A local game server: many independent human-vs-computer games in one
+process, all sharing one read-only lexicon.
+
+The protocol is one JSON object per line in each direction. Requests
+carry a "cmd" and, except for "new", the "game" they are about. "new"
+may name a layout (see layouts.LAYOUTS) and a seed:
+
+    {"cmd": "new", "layout": "super"}           -> {"game": id, ...state}
+    {"cmd": "state", "game": id}                -> state
+    {"cmd": "hint", "game": id, "top": 5}       -> {"moves": [...]}
+    {"cmd": "play", "game": id, "word": "CAT", "row": 7, "col": 7, "direction": "H"}
+                                                -> your move and the computer's reply, then state
+    {"cmd": "pass", "game": id}                 -> the computer's reply, then state
+    {"cmd": "close", "game": id}                -> {"closed": id}
+
+State is {"game", "board" (row strings, "." for empty), "rack", "scores"
+[yours, the computer's], "over"}. Errors come back as {"error": message}.
+A connection may drive any number of games. The computer's searches and
+hint move generation never run on the event loop: they go to a process
+pool when workers > 0 and to the loop's default thread pool otherwise,
+so a slow search doesn't stall other sessions.
+"""
+import asyncio
+import itertools
+import json
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from board import append_special_tiles, create_board
+from gamestate import GameState
+from layouts import LAYOUTS, STANDARD
+from lexicon import get_lexicon
+from movegen import generate_moves
+from player import Player
+from scoring import score_moves
+from search import best_move, default_workers
+from tiles import TileBag, draw_tiles
+from validate import validate_move
+
+HOST = "127.0.0.1"
+PORT = 8765
+
+
+class Session:
+    """One game between a client ("You") and the computer, on its own board and bag."""
+
+    def __init__(self, game_id, lexicon, seed=None, layout=STANDARD):
+        self.id = game_id
+        self.lock = asyncio.Lock()
+        tile_bag = TileBag(layout.distribution, seed=seed)
+        board = append_special_tiles(create_board(lexicon, layout), layout)
+        players = [Player("You"), Player("Computer")]
+        for player in players:
+            player.rack = draw_tiles(tile_bag, 7)
+        self.state = GameState(board, players, tile_bag)
+
+    def describe(self):
+        board = self.state.board
+        size = board.size
+        return {
+            "game": self.id,
+            "board": ["".join(chr(tile) if tile else "." for tile in board.cells[row * size:(row + 1) * size])
+                      for row in range(size)],
+            "rack": "".join(self.state.players[0].rack),
+            "scores": [player.score for player in self.state.players],
+            "over": self.state.is_over(),
+        }
+
+
+def _computer_move(board, rack, time_budget):
+    """Runs in the executor: the computer's best move, or None."""
+    found = best_move(board, rack, board.lexicon, time_budget=time_budget)
+    return found and found[0]
+
+
+def _hint_moves(board, rack, top):
+    """Runs in the executor: the top highest-scoring moves as (score, move) pairs."""
+    moves = generate_moves(board, rack, board.lexicon)
+    return sorted(zip(score_moves(board, moves), moves), reverse=True)[:top]
+
+
+class GameServer:
+    """Hosts sessions and answers protocol requests."""
+
+    def __init__(self, lexicon=None, workers=0, time_budget=0.0, layout=STANDARD):
+        self.lexicon = lexicon or get_lexicon()
+        self.layout = layout
+        self.time_budget = time_budget
+        self.pool = ProcessPoolExecutor(workers) if workers else None
+        self.sessions = {}
+        self._ids = itertools.count(1)
+
+    async def handle(self, request):
+        """Answers one request dict with a response dict."""
+        cmd = request.get("cmd")
+        if cmd == "new":
+            layout = LAYOUTS.get(request.get("layout"), self.layout)
+            session = Session(next(self._ids), self.lexicon, request.get("seed"), layout)
+            self.sessions[session.id] = session
+            return session.describe()
+        session = self.sessions.get(request.get("game"))
+        if session is None:
+            return {"error": f"no game {request.get('game')!r}"}
+        if cmd == "close":
+            del self.sessions[session.id]
+            return {"closed": session.id}
+        async with session.lock:
+            state = session.state
+            if cmd == "state":
+                return session.describe()
+            if cmd == "hint":
+                ranked = []
+                if state.turn == 0:
+                    ranked = await self._run(_hint_moves, state.board, list(state.player.rack),
+                                             request.get("top", 5))
+                return {"moves": [{"word": word, "row": row, "col": col, "direction": direction, "score": score}
+                                  for score, (word, row, col, direction) in ranked]}
+            if cmd not in ("play", "pass"):
+                return {"error": f"unknown command {cmd!r}"}
+            if state.is_over():
+                return {"error": "the game is over"}
+
+            response = {}
+            if cmd == "pass":
+                state.pass_turn()
+            else:
+                row, col, direction = request.get("row"), request.get("col"), request.get("direction")
+                result = validate_move(state.board, request.get("word") or "", row, col, direction,
+                                       state.player.rack)
+                if not result:
+                    return {"error": f"illegal move: {result.message}", "reason": result.reason}
+                response["score"] = state.play(result.word, row, col, direction)
+
+            if not state.is_over():
+                response["reply"] = await self._computer_turn(state)
+            response.update(session.describe())
+            return response
+
+    async def _run(self, function, *args):
+        """Runs function(*args) off the event loop, on the process pool if there is one."""
+        return await asyncio.get_running_loop().run_in_executor(self.pool, function, *args)
+
+    async def _computer_turn(self, state):
+        move = await self._run(_computer_move, state.board, list(state.player.rack), self.time_budget)
+        if move is None:
+            state.pass_turn()
+            return None
+        word, row, col, direction = move
+        score = state.play(*move)
+        return {"word": word, "row": row, "col": col, "direction": direction, "score": score}
+
+    async def serve_client(self, reader, writer):
+        try:
+            while line := await reader.readline():
+                try:
+                    response = await self.handle(json.loads(line))
+                except (ValueError, TypeError, AttributeError) as e:
+                    response = {"error": f"bad request: {e}"}
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except ConnectionResetError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host=HOST, port=PORT):
+        server = await asyncio.start_server(self.serve_client, host, port, limit=1 << 20)
+        print(f"Serving Scrabble games on {host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+
+def run_server(host=HOST, port=PORT, workers=None, time_budget=0.0, layout="standard"):
+    """
+    Runs the game server until interrupted. New games are on the layout
+    named layout unless they ask for another. workers defaults to
+    search.default_workers().
+    """
+    if workers is None:
+        workers = default_workers()
+    server = GameServer(get_lexicon(), workers, time_budget, LAYOUTS[layout])
+    try:
+        asyncio.run(server.serve(host, port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if server.pool:
+            server.pool.shutdown(cancel_futures=True)
+
+
+async def _client_session(host, port, moves, latencies, seed):
+    reader, writer = await asyncio.open_connection(host, port, limit=1 << 20)
+
+    async def request(payload):
+        started = time.perf_counter()
+        writer.write(json.dumps(payload).encode() + b"\n")
+        await writer.drain()
+        response = json.loads(await reader.readline())
+        latencies.setdefault(payload["cmd"], []).append(time.perf_counter() - started)
+        return response
+
+    state = await request({"cmd": "new", "seed": seed})
+    game = state["game"]
+    for _ in range(moves):
+        if state.get("over"):
+            break
+        hint = await request({"cmd": "hint", "game": game, "top": 1})
+        if hint["moves"]:
+            move = hint["moves"][0]
+            state = await request({"cmd": "play", "game": game, "word": move["word"], "row": move["row"],
+                                   "col": move["col"], "direction": move["direction"]})
+        else:
+            state = await request({"cmd": "pass", "game": game})
+    await request({"cmd": "close", "game": game})
+    writer.close()
+    await writer.wait_closed()
+
+
+async def load_test(host=HOST, port=PORT, sessions=100, moves=10):
+    """
+    Plays sessions concurrent games of up to moves turns against a running
+    server and returns its throughput and latency statistics. Move latency
+    covers "play" requests, which include the computer's reply.
+    """
+    latencies = {}
+    started = time.perf_counter()
+    await asyncio.gather(*(_client_session(host, port, moves, latencies, seed) for seed in range(sessions)))
+    elapsed = time.perf_counter() - started
+    requests = sum(len(times) for times in latencies.values())
+    plays = sorted(latencies.get("play", [0.0]))
+    return {
+        "sessions": sessions,
+        "requests": requests,
+        "requests_per_sec": round(requests / elapsed, 1),
+        "move_p50_ms": round(1000 * statistics.median(plays), 2),
+        "move_p99_ms": round(1000 * plays[min(len(plays) - 1, int(0.99 * len(plays)))], 2),
+        "move_max_ms": round(1000 * plays[-1], 2),
+        "wall_time": round(elapsed, 3),
+    }
+
+
+def run_load_test(host=HOST, port=PORT, sessions=100, moves=10):
+    """Runs load_test() and prints its report as JSON."""
+    print(json.dumps(asyncio.run(load_test(host, port, sessions, moves))))
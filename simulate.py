@@ -0,0 +1,150 @@
+"""
+Headless computer-vs-computer games, spread across a process pool.
+Each game is fully determined by its seed, so results are reproducible
+regardless of which worker plays it.
+"""
+import functools
+import io
+import json
+import random
+import statistics
+import sys
+import time
+
+from board import create_board, append_special_tiles
+from layouts import LAYOUTS
+from main import computer_turn
+import instrument
+import render
+from player import Player
+from pool import lexicon_pool, worker_lexicon
+from record import GameWriter, placed_move
+from scoring import score_move
+from tiles import TileBag, draw_tiles
+
+def play_selfplay_game(seed, lexicon=None, time_budget=0.0, record=False, layout="standard"):
+    """
+    Plays one game between two computer players and returns its result.
+    The game ends when the bag and a rack are empty, or when every
+    player passes in a row. With record, the result's "record" holds the
+    game's binary records (without a file header). layout names the
+    board and bag (see layouts.LAYOUTS).
+    """
+    lexicon = lexicon or worker_lexicon()
+    random.seed(seed)
+    layout = LAYOUTS[layout]
+    tile_bag = TileBag(layout.distribution, seed=seed)
+    board = create_board(lexicon, layout)
+    players = [Player("Computer 1"), Player("Computer 2")]
+    for player in players:
+        player.rack = draw_tiles(tile_bag, 7)
+
+    current_player_idx = random.randint(0, len(players) - 1)
+    first_move = True
+    passes = 0
+    turn_times = []
+    writer = GameWriter(io.BytesIO(), header=False) if record else None
+    counters_before, turns_before = instrument.counters.copy(), len(instrument.turns)
+    started = time.perf_counter()
+    with render.quiet():
+        append_special_tiles(board, layout)
+        if writer:
+            writer.start_game(board, players)
+        while passes < len(players) and (tile_bag or all(player.rack for player in players)):
+            player = players[current_player_idx]
+            cells_before = bytes(board.cells)
+            rack_before = list(player.rack)
+            score_before, bag_before = player.score, len(tile_bag)
+            turn_started = time.perf_counter()
+            instrument.begin_turn(player.name)
+            first_move = computer_turn(player, board, lexicon, first_move, score_move, tile_bag, time_budget,
+                                       players=players)
+            instrument.end_turn()
+            turn_times.append(time.perf_counter() - turn_started)
+            move = placed_move(cells_before, board)
+            passes = 0 if move else passes + 1
+            if writer:
+                drawn = player.rack[len(player.rack) - (bag_before - len(tile_bag)):]
+                writer.turn(current_player_idx, rack_before, move, player.score - score_before, drawn, board)
+            current_player_idx = (current_player_idx + 1) % len(players)
+    elapsed = time.perf_counter() - started
+
+    scores = [player.score for player in players]
+    result = {
+        "seed": seed,
+        "scores": scores,
+        "winner": scores.index(max(scores)) if scores.count(max(scores)) == 1 else None,
+        "turns": len(turn_times),
+        "elapsed": round(elapsed, 6),
+        "moves_per_sec": round(len(turn_times) / elapsed, 3) if elapsed else None,
+        "time_per_turn": round(statistics.fmean(turn_times), 6) if turn_times else None,
+        "max_turn_time": round(max(turn_times), 6) if turn_times else None,
+    }
+    if writer:
+        writer.end_game(scores)
+        result["record"] = writer.stream.getvalue()
+    if instrument.enabled:
+        turns = instrument.turns[turns_before:]
+        for number, turn in enumerate(turns, 1):
+            turn.update(game=seed, game_turn=number)
+        result["instrument"] = (dict(instrument.counters - counters_before), turns)
+        del instrument.turns[turns_before:]
+    return result
+
+
+def summarize(results, wall_time):
+    """Aggregates per-game results into one summary record."""
+    scores = [score for result in results for score in result["scores"]]
+    turns = sum(result["turns"] for result in results)
+    turn_seconds = sum(result["time_per_turn"] * result["turns"] for result in results if result["turns"])
+    return {
+        "summary": True,
+        "games": len(results),
+        "mean_score": round(statistics.fmean(scores), 3) if scores else None,
+        "mean_spread": round(statistics.fmean(abs(r["scores"][0] - r["scores"][1]) for r in results), 3) if results else None,
+        "mean_turns": round(turns / len(results), 3) if results else None,
+        "time_per_turn": round(turn_seconds / turns, 6) if turns else None,
+        "moves_per_sec": round(turns / wall_time, 3) if wall_time else None,
+        "games_per_sec": round(len(results) / wall_time, 3) if wall_time else None,
+        "wall_time": round(wall_time, 3),
+    }
+
+
+def run_selfplay(games, seed=0, workers=None, out="-", time_budget=0.0, record=None, layout="standard"):
+    """
+    Plays games with seeds seed..seed+games-1 on a pool of workers and
+    writes one JSON line per game, followed by a summary line. Each
+    computer turn may search for up to time_budget seconds. With record,
+    the games are also written, in seed order, to that game record file.
+    Every game is played on the layout named layout.
+    """
+    seeds = range(seed, seed + games)
+    stream = sys.stdout if out == "-" else open(out, "w")
+    record_file = open(record, "wb") if record else None
+    results = []
+    started = time.perf_counter()
+    try:
+        if record_file:
+            GameWriter(record_file)
+        with lexicon_pool(workers) as pool:
+            play = functools.partial(play_selfplay_game, time_budget=time_budget, record=bool(record),
+                                     layout=layout)
+            for result in pool.imap(play, seeds, chunksize=max(1, games // 256)):
+                if record_file:
+                    record_file.write(result.pop("record"))
+                if "instrument" in result:
+                    counters, turns = result.pop("instrument")
+                    instrument.counters.update(counters)
+                    # Number turns across the whole run; each keeps its game's seed and turn.
+                    for turn in turns:
+                        turn["turn"] = len(instrument.turns) + 1
+                        instrument.turns.append(turn)
+                results.append(result)
+                stream.write(json.dumps(result) + "\n")
+        stream.write(json.dumps(summarize(results, time.perf_counter() - started)) + "\n")
+    finally:
+        if stream is not sys.stdout:
+            stream.close()
+        if record_file:
+            record_file.close()
+    return results
@@ -12,39 +12,94 @@ LETTER_POINTS = {
     "S": 1, "T": 1, "U": 1, "V": 4, "W": 4, "X": 8, "Y": 4, "Z": 10, "@": 0
 }
 
+class TileBag:
+    """
+    A bag of tiles backed by a shuffled list. Draws take tiles off the end
+    of the live region, so each draw is O(1) and every remaining tile (not
+    every remaining letter) is equally likely. Drawn tiles stay in the
+    list past the live region, which makes undoing draws O(1) as well.
+    """
+
+    __slots__ = ("distribution", "_tiles", "_size", "_rng")
+
+    def __init__(self, distribution=TILE_BAG, seed=None, rng=None):
+        self.distribution = distribution
+        self._rng = rng or random.Random(seed)
+        self._tiles = [tile for tile, count in distribution.items() for _ in range(count)]
+        self._rng.shuffle(self._tiles)
+        self._size = len(self._tiles)
+
+    def __len__(self):
+        return self._size
+
+    def __bool__(self):
+        return self._size > 0
+
+    def tiles(self):
+        """Returns the tiles still in the bag."""
+        return self._tiles[:self._size]
+
+    def draw(self, num=1):
+        """Draws up to num tiles; fewer if the bag runs out."""
+        num = min(num, self._size)
+        start = self._size - num
+        drawn = self._tiles[start:self._size]
+        self._size = start
+        return drawn
+
+    def undraw(self, num):
+        """Puts back the last num tiles drawn, as long as nothing was returned since."""
+        self._size += num
+
+    def put_back(self, tiles):
+        """Returns tiles to the bag, each at a uniformly random position."""
+        for tile in tiles:
+            j = self._rng.randrange(self._size + 1)
+            if self._size == len(self._tiles):
+                self._tiles.append(tile)
+            else:
+                self._tiles[self._size] = tile
+            self._tiles[self._size], self._tiles[j] = self._tiles[j], self._tiles[self._size]
+            self._size += 1
+
+    def exchange(self, tiles):
+        """Draws replacements for tiles, then returns tiles to the bag."""
+        if len(tiles) > self._size:
+            return list(tiles)
+        drawn = self.draw(len(tiles))
+        self.put_back(tiles)
+        return drawn
+
+    def shuffle(self):
+        """Reshuffles the tiles still in the bag."""
+        live = self._tiles[:self._size]
+        self._rng.shuffle(live)
+        self._tiles[:self._size] = live
+
+    def snapshot(self):
+        """Captures the bag's contents and order for restore()."""
+        return self._size, tuple(self._tiles)
+
+    def restore(self, snapshot):
+        """Rolls the bag back to a snapshot()."""
+        self._size, tiles = snapshot
+        self._tiles = list(tiles)
+
+    def copy(self, seed=None):
+        """Returns an independent bag with the same tiles in the same order."""
+        bag = TileBag.__new__(TileBag)
+        bag.distribution = self.distribution
+        bag._tiles = self._tiles[:]
+        bag._size = self._size
+        bag._rng = random.Random(seed)
+        return bag
+
+
 def draw_tiles(tile_bag, num=7):
     """Draws tiles from the tile bag."""
-    tiles = []
-    for _ in range(num):
-        if not tile_bag:
-            break
-        tile = random.choice(list(tile_bag.keys()))
-        tiles.append(tile)
-        tile_bag[tile] -= 1
-        if tile_bag[tile] == 0:
-            del tile_bag[tile]
-    return tiles
+    return tile_bag.draw(num)
 
 
-
-#function to calculate score
-   
 def calculate_score(word):
-
-  score = 0
-  letter_values = {
-      'a': 1, 'e': 1, 'i': 1, 'o': 1, 'u': 1, 
-      'l': 1, 'n': 1, 'r': 1, 's': 1, 't': 1, 
-      'd': 2, 'g': 2, 
-      'b': 3, 'c': 3, 'm': 3, 'p': 3, 
-      'f': 4, 'h': 4, 'v': 4, 'w': 4, 'y': 4, 
-      'k': 5, '@':0,
-      'j': 8, 'x': 8, 
-      'q': 10, 'z': 10,
-  }
-
-  for letter in word.lower():
-    if letter in letter_values:
-      score += letter_values[letter]
-
-    return sum(LETTER_POINTS[letter] for letter in word.upper())
\ No newline at end of file
+    """Sums the face value of a word's letters; blanks (lowercase or '@') score nothing."""
+    return sum(LETTER_POINTS.get(letter, 0) for letter in word if not letter.islower())
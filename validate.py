@@ -0,0 +1,175 @@
+"""
+Move legality in one pass. validate_move() walks a placement's squares
+once and checks, as it goes, that the move is on the board and spells a
+whole line word, that it agrees with the tiles it plays through, that
+each new tile comes from the rack (a blank standing in when the letter
+itself is missing), that every cross-word it forms is a word and that it
+touches the tiles already down (or covers the centre on an empty board).
+The main word is walked through the lexicon and the move is scored along
+the way, so a legal move comes back with everything needed to play it.
+
+Connectivity and cross-words come from the board's anchors and
+cross-checks, the same tables the move generator uses, so a move is
+legal exactly when generate_moves() would offer it.
+"""
+import instrument
+from board import LETTER_BITS
+from lexicon import get_lexicon
+from scoring import BINGO_BONUS, BINGO_TILES, LETTER_MULTIPLIERS, TILE_POINTS, WORD_MULTIPLIERS
+
+BLANK = "@"
+
+BAD_DIRECTION = "bad_direction"
+NOT_LETTERS = "not_letters"
+OUT_OF_BOUNDS = "out_of_bounds"
+NOT_WHOLE_WORD = "not_whole_word"
+CELL_CONFLICT = "cell_conflict"
+NOT_IN_RACK = "not_in_rack"
+BAD_CROSS_WORD = "bad_cross_word"
+NOT_A_WORD = "not_a_word"
+NO_NEW_TILES = "no_new_tiles"
+NOT_CONNECTED = "not_connected"
+MISSES_CENTER = "misses_center"
+
+MESSAGES = {
+    BAD_DIRECTION: "the direction must be H or V",
+    NOT_LETTERS: "a word can only contain letters",
+    OUT_OF_BOUNDS: "the word doesn't fit on the board",
+    NOT_WHOLE_WORD: "the word runs into tiles before or after it",
+    CELL_CONFLICT: "the word doesn't match the tiles already on the board",
+    NOT_IN_RACK: "you don't have the tiles for that word",
+    BAD_CROSS_WORD: "it forms an invalid word across",
+    NOT_A_WORD: "it isn't in the dictionary",
+    NO_NEW_TILES: "it doesn't place any tiles",
+    NOT_CONNECTED: "it must connect to the tiles on the board",
+    MISSES_CENTER: "the first word must cover the center square",
+}
+
+
+class Validation:
+    """
+    The outcome of validate_move(): true for a legal move. reason is None
+    or one of the rejection codes above. A legal move also has word (with
+    the letters played by blanks in lowercase), score and used (the rack
+    tiles it takes, '@' for a blank).
+    """
+
+    __slots__ = ("reason", "word", "score", "used")
+
+    def __init__(self, reason=None, word=None, score=0, used=()):
+        self.reason = reason
+        self.word = word
+        self.score = score
+        self.used = used
+
+    def __bool__(self):
+        return self.reason is None
+
+    def __repr__(self):
+        if self.reason:
+            return f"Validation(rejected: {self.reason})"
+        return f"Validation({self.word!r}, score={self.score}, used={self.used!r})"
+
+    @property
+    def message(self):
+        """A sentence explaining a rejection, for players."""
+        return MESSAGES.get(self.reason, "")
+
+
+def _rejected(reason):
+    if instrument.enabled:
+        instrument.count(f"validate.rejected.{reason}")
+    return Validation(reason)
+
+
+def validate_move(board, word, start_row, start_col, direction, rack=None, lexicon=None):
+    """
+    Checks placing word at (start_row, start_col) going direction ("H" or
+    "V") on board and returns a Validation. Uppercase letters on new
+    squares are taken from rack, or played with a blank if rack has none
+    left; lowercase ones must be blanks. Without a rack, tile ownership
+    isn't checked. Words are looked up in lexicon (by default the board's).
+    """
+    if instrument.enabled:
+        instrument.count("validate.calls")
+    if direction not in ("H", "V"):
+        return _rejected(BAD_DIRECTION)
+    if not word or not word.isascii() or not word.isalpha():
+        return _rejected(NOT_LETTERS)
+    size = board.size
+    length = len(word)
+    if not (0 <= start_row < size and 0 <= start_col < size):
+        return _rejected(OUT_OF_BOUNDS)
+    # Anchors, cross-checks and cross-scores are stored line by line in the direction of play.
+    if direction == "H":
+        index, step, pos, line_index = start_row * size + start_col, 1, start_col, start_row * size + start_col
+    else:
+        index, step, pos, line_index = start_row * size + start_col, size, start_row, start_col * size + start_row
+    if pos + length > size:
+        return _rejected(OUT_OF_BOUNDS)
+    cells = board.cells
+    if (pos > 0 and cells[index - step]) or (pos + length < size and cells[index + length * step]):
+        return _rejected(NOT_WHOLE_WORD)
+
+    counts = None
+    if rack is not None:
+        counts = {}
+        for tile in rack:
+            counts[tile] = counts.get(tile, 0) + 1
+    lexicon = lexicon or board.lexicon or get_lexicon()
+    children = lexicon.children
+    node, terminal = lexicon.root, False
+    checks, crosses = board.cross_checks[direction], board.cross_scores[direction]
+    anchors, premiums = board.anchor_flags[direction], board.premiums
+    played, used = [], []
+    connected = False
+    main = extra = 0
+    multiplier = 1
+    for letter in word:
+        tile = cells[index]
+        upper = letter.upper()
+        if tile:
+            if (tile & ~32) != ord(upper):
+                return _rejected(CELL_CONFLICT)
+            letter = chr(tile)
+            main += TILE_POINTS[tile]
+            connected = True
+        else:
+            if counts is None:
+                used.append(BLANK if letter.islower() else letter)
+            elif letter.isupper() and counts.get(letter):
+                counts[letter] -= 1
+                used.append(letter)
+            elif counts.get(BLANK):
+                counts[BLANK] -= 1
+                letter = letter.lower()
+                used.append(BLANK)
+            else:
+                return _rejected(NOT_IN_RACK)
+            if not checks[line_index] & LETTER_BITS[upper]:
+                return _rejected(BAD_CROSS_WORD)
+            if anchors[line_index]:
+                connected = True
+            premium = premiums[index]
+            value = TILE_POINTS[ord(letter)] * LETTER_MULTIPLIERS[premium]
+            main += value
+            multiplier *= WORD_MULTIPLIERS[premium]
+            cross = crosses[line_index]
+            if cross >= 0:
+                extra += (cross + value) * WORD_MULTIPLIERS[premium]
+        edge = children(node).get(upper) if node is not None else None
+        node, terminal = edge if edge is not None else (None, False)
+        played.append(letter)
+        index += step
+        line_index += 1
+
+    if not used:
+        return _rejected(NO_NEW_TILES)
+    if not connected:
+        return _rejected(NOT_CONNECTED if any(cells) else MISSES_CENTER)
+    if not terminal:
+        return _rejected(NOT_A_WORD)
+    score = main * multiplier + extra
+    if len(used) == BINGO_TILES:
+        score += BINGO_BONUS
+    return Validation(None, "".join(played), score, used)